@@ -4,16 +4,38 @@ GRASS Proxy & Captcha Key Scraper & Tester
 A comprehensive tool to scrape, test, and validate proxies and captcha keys
 """
 
+import argparse
+import array
 import asyncio
+import cProfile
+import functools
+import gzip
+import hashlib
+import hmac
 import aiohttp
+from aiohttp import web
 import requests
 import time
 import random
+import secrets
 import json
+import heapq
+import signal
+import itertools
+import math
+import mmap
 import os
+import pstats
+import socket
+import struct
 import sys
+import tracemalloc
+import uuid
+import zlib
+from collections import OrderedDict, deque
+from contextlib import aclosing, asynccontextmanager, contextmanager, nullcontext
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional, Union, Sequence
+from typing import List, Dict, Tuple, Optional, Union, Sequence, Callable, Iterable, Sized
 from pathlib import Path
 from rich.console import Console
 from rich.panel import Panel
@@ -26,12 +48,776 @@ from rich.live import Live
 from rich.align import Align
 from concurrent.futures import ThreadPoolExecutor
 import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from urllib.parse import urlparse, urljoin, quote
 import re
 import urllib.parse
 
 console = Console()
 
+class MetricsRegistry:
+    """Thread-safe in-process metrics rendered in the Prometheus text exposition format"""
+
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, metric_type: str, help_text: str, buckets: Optional[Sequence[float]] = None):
+        """Register a counter, gauge or histogram."""
+        self._metrics[name] = {
+            "type": metric_type,
+            "help": help_text,
+            "buckets": tuple(buckets or self.DEFAULT_BUCKETS),
+            "samples": {}
+        }
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            samples = self._metrics[name]["samples"]
+            samples[key] = samples.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._metrics[name]["samples"][key] = float(value)
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            metric = self._metrics[name]
+            histogram = metric["samples"].setdefault(key, {
+                "buckets": [0] * len(metric["buckets"]), "count": 0, "sum": 0.0
+            })
+            for i, bound in enumerate(metric["buckets"]):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["count"] += 1
+            histogram["sum"] += value
+
+    @staticmethod
+    def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+        if not labels:
+            return ""
+        escaped = []
+        for key, value in labels:
+            value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+            escaped.append(f'{key}="{value}"')
+        return "{" + ",".join(escaped) + "}"
+
+    def render(self) -> str:
+        """Render every metric in the text exposition format."""
+        lines = []
+        with self._lock:
+            for name, metric in self._metrics.items():
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['type']}")
+                for labels, value in metric["samples"].items():
+                    if metric["type"] != "histogram":
+                        lines.append(f"{name}{self._format_labels(labels)} {value:g}")
+                        continue
+                    for bound, count in zip(metric["buckets"], value["buckets"]):
+                        bucket_labels = self._format_labels(labels + (("le", f"{bound:g}"),))
+                        lines.append(f"{name}_bucket{bucket_labels} {count}")
+                    lines.append(f"{name}_bucket{self._format_labels(labels + (('le', '+Inf'),))} {value['count']}")
+                    lines.append(f"{name}_sum{self._format_labels(labels)} {value['sum']:g}")
+                    lines.append(f"{name}_count{self._format_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9108) -> ThreadingHTTPServer:
+        """Serve /metrics from a daemon thread so it stays up while the menu waits for input."""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep scrapes out of the console
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+def create_metrics() -> MetricsRegistry:
+    """Registry with the scrape, discovery and test metrics exposed by the scraper"""
+    metrics = MetricsRegistry()
+    metrics.describe("grass_source_fetch_seconds", "histogram", "Time to fetch a proxy source list")
+    metrics.describe("grass_source_fetch_total", "counter", "Source list fetches by outcome")
+    metrics.describe("grass_source_fetch_bytes_total", "counter", "Bytes downloaded from proxy source lists")
+    metrics.describe("grass_source_proxies_found", "gauge", "Proxies extracted from a source on its last fetch")
+    metrics.describe("grass_proxy_tests_total", "counter", "Proxy tests by outcome")
+    metrics.describe("grass_proxy_test_latency_seconds", "histogram", "Latency of successful proxy tests")
+    metrics.describe("grass_proxy_tests_in_flight", "gauge", "Proxy tests currently running")
+    metrics.describe("grass_proxy_tests_skipped_total", "counter", "Candidates skipped because their subnet looked dead")
+    metrics.describe("grass_proxy_ttfb_seconds", "histogram", "Time to first byte of bandwidth benchmarks")
+    metrics.describe("grass_proxy_throughput_bytes_per_second", "histogram", "Sustained throughput of benchmarked proxies",
+                     buckets=(1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8))
+    metrics.describe("grass_proxy_pool_size", "gauge", "Verified proxies currently in the working pool")
+    metrics.describe("grass_proxy_effective_pool_size", "gauge", "Distinct egress clusters in the working pool")
+    metrics.describe("grass_discovery_candidates_total", "counter", "Discovered sources submitted for validation")
+    metrics.describe("grass_discovery_validated_total", "counter", "Discovered sources that passed validation")
+    metrics.describe("grass_discovery_hit_ratio", "gauge", "Share of discovered sources that passed the last validation")
+    metrics.describe("grass_http_connections_total", "counter", "HTTP connections opened or reused per session pool")
+    metrics.describe("grass_http_dns_total", "counter", "DNS lookups and DNS cache hits per session pool")
+    metrics.set("grass_proxy_tests_in_flight", 0)
+    metrics.set("grass_proxy_pool_size", 0)
+    return metrics
+
+class StageProfiler:
+    """Opt-in timing spans, event-loop lag samples and per-stage cProfile/tracemalloc captures.
+
+    Everything is written as a Chrome trace-event JSON file (viewable in
+    chrome://tracing or Perfetto) with an extra per-stage summary for diffing runs.
+    """
+
+    def __init__(self, path: Union[str, Path], cprofile: bool = False, trace_memory: bool = False,
+                 lag_interval: float = 0.1):
+        self.path = Path(path)
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.lag_interval = lag_interval
+        self.events = []
+        self.lag_samples = []
+        self._origin = time.perf_counter()
+        self._profiling = False
+        self._open_spans = 0
+        self._lag_task = None
+        if trace_memory:
+            tracemalloc.start()
+
+    def _timestamp(self) -> float:
+        """Microseconds since the profiler was created."""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def span(self, name: str):
+        """Time a stage, optionally capturing a cProfile and a tracemalloc diff for it."""
+        profile = None
+        if self.cprofile and not self._profiling:
+            # cProfile cannot nest, so only the outermost stage gets a profile
+            profile = cProfile.Profile()
+            self._profiling = True
+            profile.enable()
+        snapshot = tracemalloc.take_snapshot() if self.trace_memory else None
+        start = self._timestamp()
+        self._open_spans += 1
+        try:
+            yield
+        finally:
+            end = self._timestamp()
+            self._open_spans -= 1
+            args = {}
+            if profile is not None:
+                profile.disable()
+                self._profiling = False
+                args["cprofile"] = self._top_functions(profile)
+            if snapshot is not None:
+                current, peak = tracemalloc.get_traced_memory()
+                diff = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+                args["memory"] = {
+                    "current_bytes": current,
+                    "peak_bytes": peak,
+                    "top_allocations": [
+                        {"location": str(stat.traceback), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                        for stat in diff[:10]
+                    ]
+                }
+            self.events.append({
+                "name": name, "cat": "stage", "ph": "X", "pid": os.getpid(), "tid": 0,
+                "ts": round(start, 1), "dur": round(end - start, 1), "args": args
+            })
+
+    @staticmethod
+    def _top_functions(profile: cProfile.Profile, limit: int = 20) -> List[Dict]:
+        stats = pstats.Stats(profile).stats
+        ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [
+            {
+                "function": f"{filename}:{line}({func})",
+                "ncalls": ncalls,
+                "tottime": round(tottime, 6),
+                "cumtime": round(cumtime, 6)
+            }
+            for (filename, line, func), (_, ncalls, tottime, cumtime, _) in ranked
+        ]
+
+    def ensure_lag_monitor(self):
+        """Start sampling event-loop lag on the running loop if not already doing so."""
+        loop = asyncio.get_running_loop()
+        if self._lag_task is not None and not self._lag_task.done() and self._lag_task.get_loop() is loop:
+            return
+        self._lag_task = loop.create_task(self._sample_lag())
+
+    async def _sample_lag(self):
+        while True:
+            in_stage = self._open_spans > 0
+            expected = time.perf_counter() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            if not (in_stage and self._open_spans > 0):
+                # Time spent outside stages is mostly the menu blocking on input
+                continue
+            lag_ms = max(0.0, (time.perf_counter() - expected) * 1000)
+            self.lag_samples.append(lag_ms)
+            self.events.append({
+                "name": "event_loop_lag", "ph": "C", "pid": os.getpid(), "tid": 0,
+                "ts": round(self._timestamp(), 1), "args": {"lag_ms": round(lag_ms, 3)}
+            })
+
+    def summary(self) -> Dict:
+        stages = {}
+        for event in self.events:
+            if event["ph"] != "X":
+                continue
+            stage = stages.setdefault(event["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            duration = event["dur"] / 1000
+            stage["count"] += 1
+            stage["total_ms"] = round(stage["total_ms"] + duration, 3)
+            stage["max_ms"] = round(max(stage["max_ms"], duration), 3)
+        lag = sorted(self.lag_samples)
+        return {
+            "stages": stages,
+            "event_loop_lag_ms": {
+                "samples": len(lag),
+                "mean": round(sum(lag) / len(lag), 3) if lag else 0.0,
+                "p99": round(lag[min(len(lag) - 1, int(len(lag) * 0.99))], 3) if lag else 0.0,
+                "max": round(lag[-1], 3) if lag else 0.0
+            }
+        }
+
+    def write(self):
+        """Write the trace file, replacing any previous one at the same path."""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+        trace = {
+            "traceEvents": self.events,
+            "displayTimeUnit": "ms",
+            "metadata": {
+                "created": datetime.now().isoformat(),
+                "python": sys.version.split()[0],
+                "cprofile": self.cprofile,
+                "tracemalloc": self.trace_memory
+            },
+            "summary": self.summary()
+        }
+        with open(self.path, 'w') as f:
+            json.dump(trace, f, indent=1)
+        console.print(f"[green]✅ Profile trace saved to: {self.path}[/green]")
+
+@contextmanager
+def stop_on_interrupt(stop: asyncio.Event):
+    """Set ``stop`` on Ctrl+C instead of cancelling the running task, restoring the previous handler after.
+
+    Falls back to the default behaviour where the event loop cannot handle
+    signals (Windows, threads other than the main one).
+    """
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signal.SIGINT)
+    try:
+        loop.add_signal_handler(signal.SIGINT, stop.set)
+        hooked = True
+    except (NotImplementedError, RuntimeError, ValueError):
+        hooked = False
+    try:
+        yield stop
+    finally:
+        if hooked:
+            loop.remove_signal_handler(signal.SIGINT)
+            signal.signal(signal.SIGINT, previous)
+
+def profiled_stage(name: str):
+    """Decorator that wraps a scraper method in a profiling span when profiling is enabled"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                if self.profiler is None:
+                    return await func(self, *args, **kwargs)
+                self.profiler.ensure_lag_monitor()
+                with self.profiler.span(name):
+                    return await func(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if self.profiler is None:
+                return func(self, *args, **kwargs)
+            with self.profiler.span(name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+class SubnetProbePlanner:
+    """Hands out proxy candidates so that each /24 subnet is sampled before the rest of it is tested.
+
+    A few candidates of every subnet are probed first (round-robin). The
+    remainder of a subnet is then tested only if one of its samples worked;
+    subnets whose samples all failed are skipped or pushed to the back of the
+    queue. Ports that keep failing across subnets are pushed back the same way.
+    Skipped candidates are passed to ``on_skip`` so callers can report them.
+    Trusted candidates (e.g. ones whose last check passed) bypass sampling and
+    are handed out before everything else; their outcome counts towards their
+    subnet's samples.
+    """
+
+    def __init__(self, sample_size: int = 4, skip_dead_subnets: bool = True, port_sample_size: int = 50,
+                 on_skip: Optional[Callable[[List[str]], None]] = None, max_tracked_subnets: int = 50000):
+        self.sample_size = sample_size
+        self.skip_dead_subnets = skip_dead_subnets
+        self.port_sample_size = port_sample_size
+        self.on_skip = on_skip
+        self.max_tracked_subnets = max_tracked_subnets
+        self._queues = {}           # subnet -> candidates not handed out yet, dropped once drained
+        self._subnets = OrderedDict()  # subnet -> [handed out, tested, working], least recently used first
+        self._port_stats = {}       # port -> [tested, working]
+        self._sampling = deque()    # subnets still in their sample round
+        self._remaining = deque()   # subnets waiting for the rest of their candidates to be tested
+        self._deferred = deque()    # candidates from dead subnets/ports, tested last
+        self._trusted = deque()     # candidates handed out first, without sampling
+        self._pending = 0
+        self.in_flight = 0
+        self.skipped = 0
+        self.tested = 0
+        self.working = 0
+
+    @staticmethod
+    def _split(candidate: str) -> Tuple[str, str]:
+        host, _, port = candidate.rpartition(":")
+        return host.rsplit(".", 1)[0], port
+
+    def _stats(self, subnet: str) -> List[int]:
+        stats = self._subnets.get(subnet)
+        if stats is None:
+            stats = self._subnets[subnet] = [0, 0, 0]
+        else:
+            self._subnets.move_to_end(subnet)
+        return stats
+
+    def _evict_stats(self):
+        """Forget the least recently used subnets with nothing queued or in flight beyond the cap.
+
+        Keeps memory proportional to the candidates queued rather than to every
+        subnet seen; an evicted subnet is simply sampled again if it reappears.
+        """
+        excess = len(self._subnets) - self.max_tracked_subnets
+        if excess <= 0:
+            return
+        evicted = []
+        for subnet, (handed_out, tested, _) in self._subnets.items():
+            if len(evicted) >= excess:
+                break
+            if subnet not in self._queues and tested >= handed_out:
+                evicted.append(subnet)
+        for subnet in evicted:
+            del self._subnets[subnet]
+
+    def add(self, candidates, trusted: Iterable[str] = ()):
+        """Queue more candidates, best first; may be called while testing is in progress."""
+        trusted = set(trusted)
+        for candidate in candidates:
+            if candidate in trusted:
+                self._trusted.append(candidate)
+                self._pending += 1
+                continue
+            subnet, _ = self._split(candidate)
+            queue = self._queues.get(subnet)
+            if queue is None:
+                queue = self._queues[subnet] = deque()
+            if not queue:
+                # New or drained subnet: sample it first unless it is already known to work
+                if self._stats(subnet)[0] < self.sample_size:
+                    self._sampling.append(subnet)
+                else:
+                    self._remaining.append(subnet)
+            queue.append(candidate)
+            self._pending += 1
+        self._evict_stats()
+
+    def _port_is_dead(self, port: str) -> bool:
+        tested, working = self._port_stats.get(port, (0, 0))
+        return tested >= self.port_sample_size and working == 0 and self.working > 0
+
+    def _take(self, subnet: str) -> Optional[str]:
+        queue = self._queues.get(subnet)
+        while queue:
+            candidate = queue.popleft()
+            if self._port_is_dead(self._split(candidate)[1]):
+                self._deferred.append(candidate)
+                continue
+            self._stats(subnet)[0] += 1
+            self._pending -= 1
+            self.in_flight += 1
+            return candidate
+        return None
+
+    def _release(self, subnet: str):
+        """Drop the queue of a subnet that left the sampling/remaining rounds drained."""
+        if not self._queues.get(subnet, True):
+            del self._queues[subnet]
+
+    def next(self) -> Optional[str]:
+        """Next candidate to test, or None when nothing can be handed out right now."""
+        if self._trusted:
+            candidate = self._trusted.popleft()
+            subnet, _ = self._split(candidate)
+            self._stats(subnet)[0] += 1
+            self._pending -= 1
+            self.in_flight += 1
+            return candidate
+
+        while self._sampling:
+            subnet = self._sampling.popleft()
+            candidate = self._take(subnet)
+            if self._queues.get(subnet):
+                if self._stats(subnet)[0] < self.sample_size:
+                    self._sampling.append(subnet)
+                else:
+                    self._remaining.append(subnet)
+            else:
+                self._release(subnet)
+            if candidate is not None:
+                return candidate
+
+        undecided = 0
+        while self._remaining and undecided < len(self._remaining):
+            subnet = self._remaining[0]
+            queue = self._queues.get(subnet)
+            if not queue:
+                self._remaining.popleft()
+                self._release(subnet)
+                continue
+            handed_out, tested, working = self._stats(subnet)
+            if not working:
+                if tested < handed_out:
+                    # Samples still in flight, look at other subnets first
+                    self._remaining.rotate(-1)
+                    undecided += 1
+                    continue
+                self._remaining.popleft()
+                if self.skip_dead_subnets:
+                    self.skipped += len(queue)
+                    self._pending -= len(queue)
+                    if self.on_skip:
+                        self.on_skip(list(queue))
+                else:
+                    self._deferred.extend(queue)
+                queue.clear()
+                self._release(subnet)
+                continue
+            candidate = self._take(subnet)
+            if candidate is not None:
+                return candidate
+
+        if self._remaining:
+            # Only subnets waiting on their samples are left
+            return None
+        if self._deferred:
+            self._pending -= 1
+            self.in_flight += 1
+            return self._deferred.popleft()
+        return None
+
+    def record(self, candidate: str, is_working: bool):
+        """Feed back the outcome of a candidate handed out by next()."""
+        subnet, port = self._split(candidate)
+        self.in_flight -= 1
+        self.tested += 1
+        self.working += int(is_working)
+        stats = self._stats(subnet)
+        stats[1] += 1
+        stats[2] += int(is_working)
+        stats = self._port_stats.setdefault(port, [0, 0])
+        stats[0] += 1
+        stats[1] += int(is_working)
+
+    def pending(self) -> int:
+        """Candidates not handed out yet, excluding skipped ones."""
+        return self._pending
+
+    def exhausted(self) -> bool:
+        return not self.pending() and not self.in_flight
+
+# Binary pool snapshot: a 32-byte header followed by fixed-width 16-byte records
+SNAPSHOT_MAGIC = b"GRSP"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<4sHHQdI4x")   # magic, version, record size, generation, written at, count
+SNAPSHOT_RECORD = struct.Struct("<4sHBBII")     # IPv4, port, protocol, flags, latency ms, throughput KB/s (v2)
+SNAPSHOT_PROTOCOLS = {"http": 1, "https": 2, "socks4": 3, "socks5": 4}
+SNAPSHOT_FLAG_VERIFIED = 0x01
+SNAPSHOT_FLAG_REPRESENTATIVE = 0x02
+SNAPSHOT_FLAG_STANDBY = 0x04
+
+# Largest payload the bundled bandwidth judge will serve
+JUDGE_MAX_PAYLOAD = 100_000_000
+
+class PoolSnapshot:
+    """Read-only, memory-mapped view of a pool snapshot written by save_pool_snapshot.
+
+    Records are decoded on access straight from the mapping, so opening a
+    snapshot costs the same regardless of its size. Call refresh() to pick up
+    a newer generation once the writer has replaced the file.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._mmap = None
+        self._open()
+
+    @staticmethod
+    def read_header(path: Union[str, Path]) -> Optional[Dict]:
+        """Header of the snapshot at path, or None if it is missing or not a snapshot."""
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read(SNAPSHOT_HEADER.size)
+        except OSError:
+            return None
+        if len(raw) < SNAPSHOT_HEADER.size:
+            return None
+        magic, version, record_size, generation, written_at, count = SNAPSHOT_HEADER.unpack(raw)
+        if magic != SNAPSHOT_MAGIC:
+            return None
+        return {
+            "version": version,
+            "record_size": record_size,
+            "generation": generation,
+            "written_at": written_at,
+            "count": count
+        }
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, generation, written_at, count = SNAPSHOT_HEADER.unpack_from(mapping, 0)
+        if magic != SNAPSHOT_MAGIC or version > SNAPSHOT_VERSION or record_size < SNAPSHOT_RECORD.size:
+            mapping.close()
+            raise ValueError(f"{self.path} is not a supported pool snapshot")
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = mapping
+        self.version = version
+        self.record_size = record_size
+        self.generation = generation
+        self.written_at = written_at
+        self.count = count
+
+    def refresh(self) -> bool:
+        """Remap the file if the writer published a new generation; returns True if it did."""
+        header = self.read_header(self.path)
+        if header is None or header["generation"] == self.generation:
+            return False
+        self._open()
+        return True
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _offset(self, index: int) -> int:
+        if not 0 <= index < self.count:
+            raise IndexError("snapshot record index out of range")
+        return SNAPSHOT_HEADER.size + index * self.record_size
+
+    def address(self, index: int) -> str:
+        """"ip:port" of a record."""
+        packed, port = struct.unpack_from("<4sH", self._mmap, self._offset(index))
+        return f"{socket.inet_ntoa(packed)}:{port}"
+
+    def __getitem__(self, index: int) -> Dict:
+        packed, port, protocol, flags, latency_ms, throughput_kbps = SNAPSHOT_RECORD.unpack_from(
+            self._mmap, self._offset(index)
+        )
+        protocols = {code: name for name, code in SNAPSHOT_PROTOCOLS.items()}
+        return {
+            "proxy": f"{socket.inet_ntoa(packed)}:{port}",
+            "protocol": protocols.get(protocol, "http"),
+            "flags": flags,
+            "latency_ms": latency_ms,
+            # Version 1 snapshots always stored 0 here
+            "throughput_kbps": throughput_kbps
+        }
+
+    def pick(self) -> str:
+        """Random proxy from the snapshot."""
+        if not self.count:
+            raise IndexError("pool snapshot is empty")
+        return self.address(random.randrange(self.count))
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+class BloomFilter:
+    """Fixed-size set membership filter for integer keys, used to dedupe huge candidate streams.
+
+    Memory stays at roughly 1.8 bytes per expected item for a 0.1% false
+    positive rate; a false positive drops a candidate as a duplicate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity = max(capacity, 1000)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @staticmethod
+    def _mix(z: int) -> int:
+        # splitmix64 finalizer: packed ip:port keys are highly structured
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        return z ^ (z >> 31)
+
+    def _positions(self, key: int):
+        # Double hashing from two independent 64-bit mixes of the key
+        h1 = self._mix(key)
+        h2 = self._mix(key ^ 0x9E3779B97F4A7C15) | 1
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.size
+            yield bit >> 3, 1 << (bit & 7)
+
+    def __contains__(self, key: int) -> bool:
+        return all(self.bits[byte] & mask for byte, mask in self._positions(key))
+
+    def add(self, key: int) -> bool:
+        """Add a key; returns False if it was (probably) already present."""
+        present = True
+        for byte, mask in self._positions(key):
+            if not self.bits[byte] & mask:
+                present = False
+                self.bits[byte] |= mask
+        self.count += int(not present)
+        return not present
+
+class ScalableBloomFilter:
+    """Bloom filter that adds a larger, stricter stage whenever the current one is full.
+
+    For inputs whose size can only be guessed: the combined false positive
+    rate stays below ``error_rate`` however many keys arrive, at the cost of
+    one membership check per stage.
+    """
+
+    def __init__(self, initial_capacity: int, error_rate: float = 0.001, growth: int = 2):
+        self.growth = growth
+        # First stage at error_rate / 2, extra stages from error_rate / 8 halving
+        # each time: the stages together stay at 3/4 of error_rate plus the
+        # fill of the current one
+        self.stages = [BloomFilter(initial_capacity, error_rate / 2)]
+        self._next_error_rate = error_rate / 8
+
+    def _add_stage(self, capacity: int):
+        self.stages.append(BloomFilter(capacity, self._next_error_rate))
+        self._next_error_rate /= 2
+
+    def add(self, key: int) -> bool:
+        """Add a key; returns False if it was (probably) already present."""
+        if any(key in stage for stage in self.stages[:-1]):
+            return False
+        current = self.stages[-1]
+        if not current.add(key):
+            return False
+        if current.count >= current.capacity:
+            self._add_stage(current.capacity * self.growth)
+        return True
+
+class HttpSessionManager:
+    """Process-wide aiohttp sessions, one per connector profile, reused across stages.
+
+    "sources" is for fetching lists, discovery and APIs: keep-alive with a
+    per-host limit and cached DNS. "probes" is for requests through proxies
+    and has no overall limit (callers bound concurrency) but a small per-host
+    limit. Connections, TLS sessions and DNS results then survive between
+    stages and menu actions. Sessions are created lazily on the running loop
+    and recreated if a new loop is used.
+    """
+
+    PROFILES = {
+        "sources": {
+            "limit": 100,
+            "limit_per_host": 8,
+            "ttl_dns_cache": 600,
+            "keepalive_timeout": 60,
+            "timeout": 30
+        },
+        "probes": {
+            "limit": 0,
+            "limit_per_host": 4,
+            "ttl_dns_cache": 600,
+            "keepalive_timeout": 30,
+            "timeout": 60
+        }
+    }
+
+    def __init__(self, metrics: Optional[MetricsRegistry] = None,
+                 trace_configs: Optional[Dict[str, List[aiohttp.TraceConfig]]] = None):
+        self.metrics = metrics
+        self.trace_configs = trace_configs or {}
+        self.stats = {name: {"requests": 0, "new_connections": 0, "reused_connections": 0,
+                             "dns_lookups": 0, "dns_cache_hits": 0} for name in self.PROFILES}
+        self._sessions = {}
+
+    def _stats_trace_config(self, profile: str) -> aiohttp.TraceConfig:
+        stats = self.stats[profile]
+
+        def counter(key: str, metric: Optional[str] = None, **labels):
+            async def callback(session, context, params):
+                stats[key] += 1
+                if metric and self.metrics is not None:
+                    self.metrics.inc(metric, pool=profile, **labels)
+            return callback
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(counter("requests"))
+        trace_config.on_connection_create_end.append(
+            counter("new_connections", "grass_http_connections_total", kind="new"))
+        trace_config.on_connection_reuseconn.append(
+            counter("reused_connections", "grass_http_connections_total", kind="reused"))
+        trace_config.on_dns_cache_miss.append(counter("dns_lookups", "grass_http_dns_total", kind="lookup"))
+        trace_config.on_dns_cache_hit.append(counter("dns_cache_hits", "grass_http_dns_total", kind="cache_hit"))
+        return trace_config
+
+    def get(self, profile: str) -> aiohttp.ClientSession:
+        """Shared session of a profile for the running event loop."""
+        loop = asyncio.get_running_loop()
+        session, session_loop = self._sessions.get(profile, (None, None))
+        if session is None or session.closed or session_loop is not loop:
+            settings = self.PROFILES[profile]
+            connector = aiohttp.TCPConnector(
+                limit=settings["limit"],
+                limit_per_host=settings["limit_per_host"],
+                ttl_dns_cache=settings["ttl_dns_cache"],
+                keepalive_timeout=settings["keepalive_timeout"]
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings["timeout"]),
+                trace_configs=[self._stats_trace_config(profile)] + self.trace_configs.get(profile, [])
+            )
+            self._sessions[profile] = (session, loop)
+        return session
+
+    @asynccontextmanager
+    async def session(self, profile: str):
+        """``async with`` access to a shared session; leaving the block keeps it open."""
+        yield self.get(profile)
+
+    async def close(self):
+        """Close every session created on the running loop."""
+        loop = asyncio.get_running_loop()
+        for profile, (session, session_loop) in list(self._sessions.items()):
+            if session_loop is loop and not session.closed:
+                await session.close()
+            del self._sessions[profile]
+
 class ProxyCaptchaScraper:
     def __init__(self):
         self.working_proxies = []
@@ -39,13 +825,69 @@ class ProxyCaptchaScraper:
         self.working_captcha_keys = []
         self.failed_captcha_keys = []
         self.test_results = {}
+        # Verified proxies sharing an egress cluster with a working representative
+        self.standby_proxies = {}
         self.last_used_sources = {"proxies": [], "captcha": []}
         self._last_used_sources_file = self.get_downloads_folder() / "grass_last_used_sources.json"
         # New: persistent set of all used sources
         self._all_used_sources_file = self.get_downloads_folder() / "grass_all_used_sources.json"
         self.all_used_sources = {"proxies": set(), "captcha": set()}
+        # Persistent per-proxy health used by the re-validation scheduler
+        self._proxy_health_file = self.get_downloads_folder() / "grass_proxy_health.json"
+        self.proxy_health = {}
+        # Test yield of each proxy source and the source each scraped proxy came from
+        self._source_stats_file = self.get_downloads_folder() / "grass_source_stats.json"
+        self.source_stats = {}
+        self.proxy_origins = {}
+        # Compressed per-source listings from the previous fetch, for delta scraping
+        self._source_snapshots_dir = self.get_downloads_folder() / "grass_source_snapshots"
+        self._pending_source_snapshots = {}  # source -> (already recorded keys, new keys) until the delta is consumed
         self._load_last_used_sources()
         self._load_all_used_sources()
+        self._load_proxy_health()
+        self._load_source_stats()
+
+        # Re-validation scheduler tuning (seconds)
+        self.revalidation_settings = {
+            "base_interval": 300,      # first re-check after a successful test
+            "max_interval": 3600,      # stable fast proxies are checked at most this rarely
+            "flaky_interval": 120,     # proxies with a poor pass rate are checked this often
+            "flaky_pass_rate": 0.8,
+            "slow_latency": 3.0,       # proxies slower than this never reach max_interval
+            "retry_interval": 30,      # first retry after a failure, doubled on each failure
+            "max_failures": 5,         # consecutive failures before a proxy is dropped
+            "health_retention": 7 * 86400,  # health records not checked for this long are pruned
+        }
+
+        # Proxy probe budgets (seconds). connect/read are the defaults and upper
+        # bounds; once min_samples probes succeeded, each budget becomes
+        # percentile * margin_ratio + margin of the latencies observed this run.
+        self.proxy_timeout_settings = {
+            "connect": 5.0,
+            "read": 10.0,
+            "min_connect": 1.0,
+            "min_read": 2.0,
+            "min_samples": 20,
+            "percentile": 0.95,
+            "margin_ratio": 1.5,
+            "margin": 0.5,
+            "hedge": True,             # start a second attempt once a probe exceeds the percentile
+        }
+        self._reset_probe_timeouts()
+
+        # Subnet/port-aware ordering of proxy tests, see SubnetProbePlanner
+        self.probe_planner_settings = {
+            "sample_size": 4,              # candidates probed per /24 before deciding on the rest
+            "skip_dead_subnets": True,     # False tests dead subnets last instead of skipping them
+            "port_sample_size": 50,        # failures on a port before its candidates go to the back
+        }
+
+        # Scrape, discovery and test metrics, optionally served on /metrics
+        self.metrics = create_metrics()
+        # Stage profiler, only set when profiling is requested
+        self.profiler: Optional[StageProfiler] = None
+        # Shared HTTP sessions for source fetching and proxy probing
+        self.http = HttpSessionManager(self.metrics, {"probes": [self._probe_trace_config()]})
 
         # Proxy sources - expanded list
         self.proxy_sources = [
@@ -201,7 +1043,131 @@ class ProxyCaptchaScraper:
         except Exception as e:
             console.print(f"[yellow]Warning: Could not save all used sources: {e}[/yellow]")
 
-    def get_rotated_sources(self, source_type: str, count: int = 5) -> List[str]:
+    def _load_proxy_health(self):
+        """Load per-proxy health records from file if it exists."""
+        try:
+            if self._proxy_health_file.exists():
+                with open(self._proxy_health_file, 'r') as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        self.proxy_health = data
+        except Exception as e:
+            console.print(f"[yellow]Warning: Could not load proxy health: {e}[/yellow]")
+
+    def _load_source_stats(self):
+        """Load per-source test yield history from file if it exists."""
+        try:
+            if self._source_stats_file.exists():
+                with open(self._source_stats_file, 'r') as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        self.source_stats = data
+        except Exception as e:
+            console.print(f"[yellow]Warning: Could not load source stats: {e}[/yellow]")
+
+    def _save_source_stats(self):
+        """Save per-source test yield history to file."""
+        try:
+            with open(self._source_stats_file, 'w') as f:
+                json.dump(self.source_stats, f, indent=2)
+        except Exception as e:
+            console.print(f"[yellow]Warning: Could not save source stats: {e}[/yellow]")
+
+    def _prune_proxy_health(self) -> int:
+        """Drop health records of dead proxies and of proxies not checked for a long time."""
+        settings = self.revalidation_settings
+        cutoff = time.time() - settings["health_retention"]
+        in_pool = {p["proxy"] if isinstance(p, dict) else p for p in self.working_proxies}
+        stale = [
+            proxy for proxy, health in self.proxy_health.items()
+            if proxy not in in_pool and (
+                health.get("consecutive_failures", 0) >= settings["max_failures"]
+                or (health.get("last_checked") or 0) < cutoff
+            )
+        ]
+        for proxy in stale:
+            del self.proxy_health[proxy]
+        return len(stale)
+
+    @profiled_stage("save_proxy_health")
+    def _save_proxy_health(self):
+        """Prune and save per-proxy health records to file."""
+        self._prune_proxy_health()
+        try:
+            with open(self._proxy_health_file, 'w') as f:
+                # Compact: the file can hold many thousands of records
+                json.dump(self.proxy_health, f, separators=(",", ":"))
+        except Exception as e:
+            console.print(f"[yellow]Warning: Could not save proxy health: {e}[/yellow]")
+
+    async def close(self):
+        """Close the shared HTTP sessions; call before the event loop ends."""
+        await self.http.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def run_until_closed(self, coro):
+        """Await ``coro`` and close the shared sessions on the same loop afterwards."""
+        async with self:
+            return await coro
+
+    async def benchmark_session_reuse(self, stages: int = 5, requests_per_stage: int = 40,
+                                      port: int = 8898) -> Dict[str, Dict]:
+        """Compare a fresh session per stage with the shared sessions against a local server.
+
+        Each stage fires requests_per_stage concurrent requests at localhost, as a
+        scrape, test or discovery stage would. New connections equal TCP (and, on
+        real sources, TLS) handshakes; DNS lookups are resolver round trips.
+        """
+        runner, path = await self.start_judge_server("127.0.0.1", port, payload_bytes=2048)
+        url = f"http://localhost:{port}{path}"
+        results = {}
+        try:
+            for mode in ("per-stage", "shared"):
+                manager = HttpSessionManager()
+                started = time.perf_counter()
+                for _ in range(stages):
+                    async with manager.session("sources") as session:
+
+                        async def fetch():
+                            async with session.get(url) as response:
+                                await response.read()
+
+                        await asyncio.gather(*(fetch() for _ in range(requests_per_stage)))
+                    if mode == "per-stage":
+                        await manager.close()
+                await manager.close()
+                results[mode] = dict(manager.stats["sources"], seconds=time.perf_counter() - started)
+        finally:
+            await runner.cleanup()
+
+        table = Table(title=f"HTTP session reuse ({stages} stages x {requests_per_stage} requests)")
+        table.add_column("Mode", style="cyan")
+        table.add_column("Requests", style="white")
+        table.add_column("New connections", style="yellow")
+        table.add_column("Reused", style="green")
+        table.add_column("DNS lookups", style="yellow")
+        table.add_column("Time", style="magenta")
+        for mode, stats in results.items():
+            table.add_row(mode, str(stats["requests"]), str(stats["new_connections"]),
+                          str(stats["reused_connections"]), str(stats["dns_lookups"]),
+                          f"{stats['seconds']:.2f}s")
+        console.print(table)
+        saved = results["per-stage"]["new_connections"] - results["shared"]["new_connections"]
+        console.print(f"[green]Shared sessions saved {saved} handshakes and "
+                      f"{results['per-stage']['dns_lookups'] - results['shared']['dns_lookups']} DNS lookups[/green]")
+        return results
+
+    def _span(self, name: str):
+        """Profiling span for a sub-stage, or a no-op when profiling is off."""
+        return self.profiler.span(name) if self.profiler else nullcontext()
+
+    @profiled_stage("get_rotated_sources")
+    def get_rotated_sources(self, source_type: str, count: int = 5, quiet: bool = False) -> List[str]:
         """Get a rotated list of sources, avoiding any previously used ones. Persists usage between runs."""
         if source_type == "proxies":
             all_sources = self.proxy_sources
@@ -213,7 +1179,8 @@ class ProxyCaptchaScraper:
         available_sources = [s for s in all_sources if s not in used_sources]
         if len(available_sources) < count:
             # All sources have been used, reset and notify user
-            console.print(f"[yellow]All {source_type} sources have been used. Resetting used list for fresh rotation.[/yellow]")
+            if not quiet:
+                console.print(f"[yellow]All {source_type} sources have been used. Resetting used list for fresh rotation.[/yellow]")
             used_sources.clear()
             available_sources = all_sources.copy()
         # Select random sources
@@ -248,7 +1215,161 @@ class ProxyCaptchaScraper:
         menu.add_row("10", "❌ Exit")
         return menu
 
-    async def scrape_proxies(self) -> List[str]:
+    async def _fetch_proxy_source(self, session: aiohttp.ClientSession, source: str) -> Tuple[Optional[List[str]], str]:
+        """Fetch one proxy source and extract IP:PORT candidates; returns (proxies or None, outcome)."""
+        start = time.monotonic()
+        proxies = None
+        outcome = "error"
+        metric_outcome = "error"
+        try:
+            timeout = aiohttp.ClientTimeout(total=10)
+            async with session.get(source, timeout=timeout) as response:
+                if response.status == 200:
+                    body = await response.read()
+                    content = body.decode(response.get_encoding(), errors="replace")
+                    # Extract IP:PORT format
+                    with self._span("scrape_proxies.extract"):
+                        proxies = re.findall(r'(?:\d{1,3}\.){3}\d{1,3}:\d+', content)
+                    for proxy in proxies:
+                        self.proxy_origins.setdefault(proxy, source)
+                    outcome = metric_outcome = "ok"
+                    self.metrics.inc("grass_source_fetch_bytes_total", len(body), source=source)
+                    self.metrics.set("grass_source_proxies_found", len(proxies), source=source)
+                else:
+                    outcome = f"HTTP {response.status}"
+                    metric_outcome = f"http_{response.status}"
+        except Exception as e:
+            outcome = str(e)
+        self.metrics.observe("grass_source_fetch_seconds", time.monotonic() - start, source=source)
+        self.metrics.inc("grass_source_fetch_total", source=source, outcome=metric_outcome)
+        return proxies, outcome
+
+    @staticmethod
+    def _proxy_key(proxy: str) -> Optional[int]:
+        """Pack an IPv4 ip:port into a single integer, or None if it is not one."""
+        host, _, port = proxy.rpartition(":")
+        try:
+            return (int.from_bytes(socket.inet_aton(host), "big") << 16) | int(port)
+        except (OSError, ValueError):
+            return None
+
+    def _source_snapshot_path(self, source: str) -> Path:
+        digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+        return self._source_snapshots_dir / f"{digest}.bin"
+
+    def _load_source_snapshot(self, source: str) -> Optional[set]:
+        """Candidates seen on the previous fetch of a source, or None if it was never fetched."""
+        path = self._source_snapshot_path(source)
+        try:
+            if not path.exists():
+                return None
+            keys = array.array("Q")
+            keys.frombytes(zlib.decompress(path.read_bytes()))
+            if sys.byteorder == "big":
+                keys.byteswap()
+            return set(keys)
+        except Exception as e:
+            console.print(f"[yellow]Warning: Could not load snapshot of {source}: {e}[/yellow]")
+            return None
+
+    def _save_source_snapshot(self, source: str, keys: set):
+        """Store the candidates of a source as a compressed, sorted array of packed ip:port keys."""
+        try:
+            self._source_snapshots_dir.mkdir(parents=True, exist_ok=True)
+            packed = array.array("Q", sorted(keys))
+            if sys.byteorder == "big":
+                packed.byteswap()
+            path = self._source_snapshot_path(source)
+            temp_path = path.with_name(f".{path.name}.tmp")
+            temp_path.write_bytes(zlib.compress(packed.tobytes(), 6))
+            os.replace(temp_path, path)
+        except Exception as e:
+            console.print(f"[yellow]Warning: Could not save snapshot of {source}: {e}[/yellow]")
+
+    def _recently_checked(self, proxy: str) -> bool:
+        """Whether a proxy was checked within the longest re-check interval, passing or not."""
+        health = self.proxy_health.get(proxy)
+        return bool(health) and time.time() - (health.get("last_checked") or 0) < self.revalidation_settings["max_interval"]
+
+    def _source_delta(self, source: str, proxies: List[str]) -> List[str]:
+        """New candidates of a source since the listing recorded by commit_source_snapshots().
+
+        A candidate is new if the source did not list it when the snapshot was
+        last committed, it is not in the working pool (which the re-validation
+        scheduler keeps fresh) and it was not checked recently.
+        """
+        current = {}
+        for proxy in proxies:
+            key = self._proxy_key(proxy)
+            if key is not None:
+                current[key] = proxy
+        previous = self._load_source_snapshot(source) or set()
+        in_pool = {p["proxy"] if isinstance(p, dict) else p for p in self.working_proxies}
+        delta = {
+            key: proxy for key, proxy in current.items()
+            if key not in previous and proxy not in in_pool and not self._recently_checked(proxy)
+        }
+        # Candidates held back because they are in the pool or were checked
+        # recently are not recorded, so they are offered again once that lapses
+        self._pending_source_snapshots[source] = (previous & current.keys(), set(delta))
+        return list(delta.values())
+
+    def commit_source_snapshots(self, consumed: Optional[Iterable[str]] = None,
+                                sources: Optional[Iterable[str]] = None):
+        """Record the pending source listings once their delta has been consumed (e.g. tested).
+
+        Only new candidates that were consumed are added to the recorded
+        listing (all of them without ``consumed``); the rest are part of the
+        next delta again.
+        """
+        consumed_keys = None if consumed is None else {self._proxy_key(proxy) for proxy in consumed}
+        for source in list(sources if sources is not None else self._pending_source_snapshots):
+            pending = self._pending_source_snapshots.pop(source, None)
+            if pending is None:
+                continue
+            recorded, new = pending
+            self._save_source_snapshot(source, recorded | (new if consumed_keys is None else new & consumed_keys))
+
+    async def iter_scraped(self, sources: Optional[List[str]] = None, count: int = 8, delta_only: bool = False):
+        """Yield unique proxies as each source is fetched, without console output.
+
+        Uses ``count`` rotated sources unless ``sources`` is given. With
+        ``delta_only``, only proxies a source added since its previous fetch are
+        yielded; a source's listing is recorded once all of its proxies were
+        yielded. To stop early, break out of the loop inside
+        ``contextlib.aclosing`` so the fetch in progress is abandoned at once
+        rather than when the generator is garbage collected::
+
+            async with aclosing(scraper.iter_scraped()) as proxies:
+                async for proxy in proxies:
+                    ...
+        """
+        if sources is None:
+            sources = self.get_rotated_sources("proxies", count=count, quiet=True)
+        seen = set()
+        async with self.http.session("sources") as session:
+            for i, source in enumerate(sources):
+                proxies, _ = await self._fetch_proxy_source(session, source)
+                if proxies is not None:
+                    delta = self._source_delta(source, proxies)
+                    if delta_only:
+                        proxies = delta
+                for proxy in proxies or ():
+                    if proxy not in seen:
+                        seen.add(proxy)
+                        yield proxy
+                # Everything this source listed reached the consumer
+                self.commit_source_snapshots(sources=[source])
+                if i + 1 < len(sources):
+                    await asyncio.sleep(0.5) # Be nice to servers
+
+    @profiled_stage("scrape_proxies")
+    async def scrape_proxies(self, delta_only: bool = False) -> List[str]:
+        """Scrape rotated sources; with delta_only, keep only proxies each source added since its last fetch.
+
+        Call commit_source_snapshots() with the proxies that were tested so the
+        next delta scrape does not offer them again.
+        """
         console.print("\n[bold green]🔍 Scraping proxies from multiple sources...[/bold green]")
 
         all_proxies = set()
@@ -264,27 +1385,24 @@ class ProxyCaptchaScraper:
         ) as progress:
             task = progress.add_task("Scraping proxies...", total=len(sources_to_use))
 
-            async with aiohttp.ClientSession() as session:
+            async with self.http.session("sources") as session:
                 for source in sources_to_use:
-                    try:
-                        timeout = aiohttp.ClientTimeout(total=10)
-                        async with session.get(source, timeout=timeout) as response:
-                            if response.status == 200:
-                                content = await response.text()
-                                # Extract IP:PORT format
-                                proxies = re.findall(r'(?:\d{1,3}\.){3}\d{1,3}:\d+', content)
-                                all_proxies.update(proxies)
-                                console.print(f"[green]✓[/green] {source}: {len(proxies)} proxies found")
-                            else:
-                                console.print(f"[red]✗[/red] {source}: HTTP {response.status}")
-                    except Exception as e:
-                        console.print(f"[red]✗[/red] {source}: {str(e)}")
+                    proxies, outcome = await self._fetch_proxy_source(session, source)
+                    if proxies is not None:
+                        delta = self._source_delta(source, proxies)
+                        all_proxies.update(delta if delta_only else proxies)
+                        console.print(f"[green]✓[/green] {source}: {len(proxies)} proxies found ({len(delta)} new)")
+                    else:
+                        console.print(f"[red]✗[/red] {source}: {outcome}")
 
                     progress.advance(task)
                     await asyncio.sleep(0.5) # Be nice to servers
 
         proxies_list = list(all_proxies)
-        console.print(f"\n[bold green]✅ Total unique proxies found: {len(proxies_list)}[/bold green]")
+        if delta_only:
+            console.print(f"\n[bold green]✅ Total new proxies found: {len(proxies_list)}[/bold green]")
+        else:
+            console.print(f"\n[bold green]✅ Total unique proxies found: {len(proxies_list)}[/bold green]")
         return proxies_list
 
     async def scrape_captcha_keys(self) -> List[str]:
@@ -303,7 +1421,7 @@ class ProxyCaptchaScraper:
         ) as progress:
             task = progress.add_task("Scraping captcha keys...", total=len(sources_to_use))
 
-            async with aiohttp.ClientSession() as session:
+            async with self.http.session("sources") as session:
                 for source in sources_to_use:
                     try:
                         timeout = aiohttp.ClientTimeout(total=10)
@@ -337,35 +1455,335 @@ class ProxyCaptchaScraper:
         console.print(f"\n[bold green]✅ Total unique captcha keys found: {len(keys_list)}[/bold green]")
         return keys_list
 
-    async def test_proxy(self, proxy: str, session: aiohttp.ClientSession) -> Tuple[bool, Dict]:
+    def _reset_probe_timeouts(self):
+        """Forget observed latencies and fall back to the default probe budgets."""
+        settings = self.proxy_timeout_settings
+        self._probe_latencies = {"connect": [], "read": [], "total": []}
+        self._probe_successes = 0  # not capped like the windows, so it can pace budget updates
+        self._probe_timeouts = {
+            "connect": settings["connect"],
+            "read": settings["read"],
+            "hedge_delay": None
+        }
+
+    def _percentile(self, values: List[float], q: float) -> float:
+        """Nearest-rank percentile of a list of values."""
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+    def _record_probe_latency(self, connect: Optional[float], total: float):
+        """Record the latency of a successful probe and periodically re-derive the budgets."""
+        samples = self._probe_latencies
+        if connect is not None:
+            samples["connect"].append(connect)
+        samples["read"].append(total - (connect or 0.0))
+        samples["total"].append(total)
+        for values in samples.values():
+            # Keep only the most recent window of the current run
+            del values[:-1000]
+        self._probe_successes += 1
+
+        settings = self.proxy_timeout_settings
+        count = self._probe_successes
+        if count < settings["min_samples"] or count % 10:
+            return
+
+        q = settings["percentile"]
+
+        def budget(values: List[float], floor: float, ceiling: float) -> float:
+            value = self._percentile(values, q) * settings["margin_ratio"] + settings["margin"]
+            return round(min(ceiling, max(floor, value)), 2)
+
+        if len(samples["connect"]) >= settings["min_samples"]:
+            self._probe_timeouts["connect"] = budget(samples["connect"], settings["min_connect"], settings["connect"])
+        self._probe_timeouts["read"] = budget(samples["read"], settings["min_read"], settings["read"])
+        if settings["hedge"]:
+            self._probe_timeouts["hedge_delay"] = round(self._percentile(samples["total"], q), 2)
+
+    def _probe_trace_config(self) -> aiohttp.TraceConfig:
+        """Trace config that records how long it takes to connect to each proxy."""
+        async def on_connection_create_start(session, context, params):
+            if isinstance(context.trace_request_ctx, dict):
+                context.trace_request_ctx["connect_start"] = time.monotonic()
+
+        async def on_connection_create_end(session, context, params):
+            if isinstance(context.trace_request_ctx, dict) and "connect_start" in context.trace_request_ctx:
+                context.trace_request_ctx["connect"] = time.monotonic() - context.trace_request_ctx["connect_start"]
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
+
+    async def _probe_proxy(self, proxy: str, session: aiohttp.ClientSession) -> Tuple[bool, Dict]:
+        """Single attempt at fetching the judge URL through a proxy."""
+        budgets = self._probe_timeouts
+        timeout = aiohttp.ClientTimeout(
+            total=budgets["connect"] + budgets["read"],
+            sock_connect=budgets["connect"],
+            sock_read=budgets["read"]
+        )
+        trace_ctx = {}
         try:
             proxy_url = f"http://{proxy}"
-            timeout = aiohttp.ClientTimeout(total=10)
+            start = time.monotonic()
             async with session.get(
                 "http://httpbin.org/ip",
                 proxy=proxy_url,
-                timeout=timeout
+                timeout=timeout,
+                trace_request_ctx=trace_ctx
             ) as response:
                 if response.status == 200:
                     data = await response.json()
+                    latency = time.monotonic() - start
+                    self._record_probe_latency(trace_ctx.get("connect"), latency)
                     return True, {
                         "proxy": proxy,
                         "ip": data.get("origin", "Unknown"),
-                        "response_time": response.headers.get("X-Response-Time", "Unknown")
+                        "response_time": response.headers.get("X-Response-Time", "Unknown"),
+                        "latency": round(latency, 3)
                     }
-        except Exception as e:
+        except asyncio.TimeoutError:
+            return False, {"proxy": proxy, "error": "Timeout"}
+        except Exception:
             pass
         return False, {"proxy": proxy, "error": "Failed"}
 
-    async def test_proxies(self, proxies: List[str], max_workers: int = 50) -> List[Dict]:
-        console.print(f"\n[bold blue]⚡ Testing {len(proxies)} proxies...[/bold blue]")
+    async def test_proxy(self, proxy: str, session: aiohttp.ClientSession) -> Tuple[bool, Dict]:
+        """Test a proxy, hedging with a second attempt when the first one is unusually slow.
 
-        working_proxies = []
-        semaphore = asyncio.Semaphore(max_workers)
+        Timeouts follow the latency distribution observed so far in the current
+        run, so dead proxies are given up on quickly once the run has warmed up.
+        """
+        self.metrics.inc("grass_proxy_tests_in_flight")
+        try:
+            is_working, result = await self._test_proxy_hedged(proxy, session)
+        finally:
+            self.metrics.inc("grass_proxy_tests_in_flight", -1)
+        if is_working:
+            self.metrics.inc("grass_proxy_tests_total", outcome="working")
+            self.metrics.observe("grass_proxy_test_latency_seconds", result["latency"])
+        else:
+            self.metrics.inc("grass_proxy_tests_total", outcome=result["error"].lower())
+        return is_working, result
 
-        async def test_with_semaphore(proxy: str, session: aiohttp.ClientSession):
-            async with semaphore:
-                return await self.test_proxy(proxy, session)
+    async def _test_proxy_hedged(self, proxy: str, session: aiohttp.ClientSession) -> Tuple[bool, Dict]:
+        first = asyncio.ensure_future(self._probe_proxy(proxy, session))
+        second = None
+        try:
+            hedge_delay = self._probe_timeouts["hedge_delay"]
+            if hedge_delay is None:
+                return await first
+
+            done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+            if done:
+                return first.result()
+
+            # Borderline: slower than nearly every working proxy so far, try again in parallel
+            second = asyncio.ensure_future(self._probe_proxy(proxy, session))
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    is_working, result = attempt.result()
+                    if is_working:
+                        if attempt is second:
+                            result["hedged"] = True
+                        return is_working, result
+            return is_working, result
+        finally:
+            # Also reached when the caller is cancelled, so no attempt outlives it
+            for attempt in (first, second):
+                if attempt is not None and not attempt.done():
+                    attempt.cancel()
+
+    def _queue_candidates(self, planner: SubnetProbePlanner, candidates: List[str],
+                          port_working: Optional[Dict[str, int]] = None):
+        """Queue candidates most likely to work first; those whose last check passed skip subnet sampling."""
+        priors = self._candidate_priors(candidates, port_working)
+        trusted = [
+            proxy for proxy in candidates
+            if self.proxy_health.get(proxy, {}).get("passes") and not self.proxy_health[proxy]["consecutive_failures"]
+        ]
+        planner.add(sorted(candidates, key=priors.__getitem__, reverse=True), trusted)
+
+    async def _iter_test_results(self, proxies: Iterable[str], max_workers: int, planner: SubnetProbePlanner,
+                                 chunk_size: int = 10000):
+        """Test candidates in the order chosen by the planner, yielding results as they finish.
+
+        A list is ranked and queued at once. Any other iterable is consumed
+        lazily, ``chunk_size`` candidates at a time as the planner runs low, so
+        huge inputs start testing immediately with bounded memory.
+        """
+        source = None
+        # Scanning the health records once per run keeps chunked refills linear
+        port_working = self._working_ports()
+        if isinstance(proxies, list):
+            self._queue_candidates(planner, proxies, port_working)
+        else:
+            source = iter(proxies)
+        results = asyncio.Queue()
+        changed = asyncio.Condition()
+
+        def refill():
+            nonlocal source
+            if source is None or planner.pending() >= max(chunk_size // 2, max_workers * 4):
+                return
+            chunk = list(itertools.islice(source, chunk_size))
+            if len(chunk) < chunk_size:
+                source = None
+            self._queue_candidates(planner, chunk, port_working)
+
+        async def worker(session: aiohttp.ClientSession):
+            while True:
+                refill()
+                proxy = planner.next()
+                if proxy is None:
+                    if planner.exhausted() and source is None:
+                        return
+                    # Waiting on samples in flight before deciding about the rest of a subnet
+                    async with changed:
+                        await changed.wait()
+                    continue
+                is_working, result = await self.test_proxy(proxy, session)
+                planner.record(proxy, is_working)
+                results.put_nowait((is_working, result))
+                async with changed:
+                    changed.notify_all()
+
+        async def run_workers(session: aiohttp.ClientSession):
+            try:
+                await asyncio.gather(*(worker(session) for _ in range(max_workers)))
+            finally:
+                results.put_nowait(None)
+
+        async with self.http.session("probes") as session:
+            runner = asyncio.create_task(run_workers(session))
+            try:
+                while True:
+                    item = await results.get()
+                    if item is None:
+                        break
+                    yield item
+                await runner
+            finally:
+                if not runner.done():
+                    runner.cancel()
+                    try:
+                        await runner
+                    except asyncio.CancelledError:
+                        pass
+
+    def _working_ports(self) -> Dict[str, int]:
+        """Number of proxies with a passing check per port, from the health records."""
+        port_working = {}
+        for proxy, health in self.proxy_health.items():
+            if health.get("passes"):
+                port = proxy.rpartition(":")[2]
+                port_working[port] = port_working.get(port, 0) + 1
+        return port_working
+
+    def _candidate_priors(self, proxies: List[str],
+                          port_working: Optional[Dict[str, int]] = None) -> Dict[str, float]:
+        """Estimate how likely each candidate is to work, between 0 and 1.
+
+        Combines the candidate's own health history, the test yield of the
+        source it was scraped from and how common its port is among proxies
+        that worked before (``port_working``, see _working_ports).
+        """
+        if port_working is None:
+            port_working = self._working_ports()
+        total_working = sum(port_working.values())
+
+        priors = {}
+        for proxy in proxies:
+            # (estimate, weight) pairs, each estimate Laplace-smoothed towards 0.5
+            estimates = []
+            health = self.proxy_health.get(proxy)
+            if health and health.get("checks"):
+                estimates.append(((health["passes"] + 1) / (health["checks"] + 2), 3.0))
+            source = self.source_stats.get(self.proxy_origins.get(proxy))
+            if source and source.get("tested"):
+                estimates.append(((source["working"] + 1) / (source["tested"] + 2), 1.0))
+            if total_working:
+                share = port_working.get(proxy.rpartition(":")[2], 0) / total_working
+                estimates.append((min(1.0, 0.5 + share), 0.5))
+            if estimates:
+                priors[proxy] = sum(e * w for e, w in estimates) / sum(w for _, w in estimates)
+            else:
+                priors[proxy] = 0.5
+        return priors
+
+    def _record_source_yield(self, proxy: str, is_working: bool):
+        """Credit a test outcome to the source the proxy was scraped from."""
+        source = self.proxy_origins.get(proxy)
+        if source is None:
+            return
+        stats = self.source_stats.setdefault(source, {"tested": 0, "working": 0})
+        stats["tested"] += 1
+        stats["working"] += int(is_working)
+
+    async def iter_tested(self, candidates: Iterable[str], max_workers: int = 50, target_count: Optional[int] = None,
+                          planner: Optional[SubnetProbePlanner] = None, reset_timeouts: bool = True):
+        """Test candidates and yield each result as soon as it is known, without console output.
+
+        Candidates are tested most promising first; iterables other than lists
+        are consumed lazily and ranked chunk by chunk. Every yielded dict has a
+        ``working`` flag plus the fields returned by test_proxy. With
+        ``target_count``, iteration ends once that many proxies worked and the
+        tests still in flight are cancelled. Probe budgets start from the
+        defaults unless ``reset_timeouts`` is False, which keeps what earlier
+        runs observed.
+
+        Breaking out of an ``async for`` does not stop the generator by itself:
+        the tests keep running until it is closed or garbage collected. Wrap it
+        in ``contextlib.aclosing`` so leaving the block cancels them::
+
+            async with aclosing(scraper.iter_tested(candidates)) as results:
+                async for result in results:
+                    if result["working"]:
+                        break
+        """
+        planner = planner or SubnetProbePlanner(**self.probe_planner_settings)
+        if reset_timeouts:
+            self._reset_probe_timeouts()
+        working = 0
+
+        results = self._iter_test_results(candidates, max_workers, planner)
+        try:
+            async for is_working, result in results:
+                # A first-time failure gets no record, so streaming millions of dead candidates stays bounded
+                self._record_proxy_health(result["proxy"], is_working, result, create=is_working)
+                self._record_source_yield(result["proxy"], is_working)
+                working += int(is_working)
+                yield dict(result, working=is_working)
+                if target_count and working >= target_count:
+                    break
+        finally:
+            # Cancels the workers still probing when stopping early
+            await results.aclose()
+            self.metrics.inc("grass_proxy_tests_skipped_total", planner.skipped)
+            self._save_proxy_health()
+            self._save_source_stats()
+
+    @profiled_stage("test_proxies")
+    async def test_proxies(self, proxies: Iterable[str], max_workers: int = 50,
+                           on_result: Optional[Callable[[bool, Dict], None]] = None,
+                           target_count: Optional[int] = None,
+                           planner: Optional[SubnetProbePlanner] = None,
+                           reset_timeouts: bool = True) -> List[Dict]:
+        """Test proxies, most promising first; with target_count, stop once that many work."""
+        total = len(proxies) if isinstance(proxies, Sized) else None
+        count = total if total is not None else "streamed"
+        if target_count:
+            console.print(f"\n[bold blue]⚡ Testing up to {count} proxies "
+                          f"until {target_count} work...[/bold blue]")
+        else:
+            console.print(f"\n[bold blue]⚡ Testing {count} proxies...[/bold blue]")
+
+        working_proxies = []
+        planner = planner or SubnetProbePlanner(**self.probe_planner_settings)
 
         with Progress(
             SpinnerColumn(),
@@ -373,24 +1791,755 @@ class ProxyCaptchaScraper:
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             console=console
         ) as progress:
-            task = progress.add_task("Testing proxies...", total=len(proxies))
-
-            async with aiohttp.ClientSession() as session:
-                tasks = [test_with_semaphore(proxy, session) for proxy in proxies]
-
-                for coro in asyncio.as_completed(tasks):
-                    is_working, result = await coro
+            task = progress.add_task("Testing proxies...", total=total)
+
+            async with aclosing(self.iter_tested(proxies, max_workers, target_count, planner,
+                                                 reset_timeouts)) as results:
+                async for result in results:
+                    is_working = result.pop("working")
+                    if on_result:
+                        on_result(is_working, result)
                     if is_working:
                         working_proxies.append(result)
                         console.print(f"[green]✓[/green] {result['proxy']} - {result['ip']}")
                     else:
                         console.print(f"[red]✗[/red] {result['proxy']}")
 
-                    progress.advance(task)
+                    progress.update(task, completed=planner.tested + planner.skipped)
 
-        console.print(f"\n[bold green]✅ Working proxies: {len(working_proxies)}/{len(proxies)}[/bold green]")
+        if target_count and len(working_proxies) >= target_count:
+            console.print(f"[blue]Target of {target_count} working proxies reached, "
+                          f"cancelled the remaining tests[/blue]")
+        budgets = self._probe_timeouts
+        console.print(
+            f"[blue]Probe budgets: connect {budgets['connect']}s, read {budgets['read']}s, "
+            f"hedge after {budgets['hedge_delay'] or '-'}s[/blue]"
+        )
+        if planner.skipped:
+            console.print(f"[blue]Skipped {planner.skipped} candidates in subnets whose samples all failed[/blue]")
+        self.metrics.set("grass_proxy_pool_size", len(working_proxies))
+        console.print(f"\n[bold green]✅ Working proxies: {len(working_proxies)}/{planner.tested} tested[/bold green]")
         return working_proxies
 
+    def _record_proxy_health(self, proxy: str, is_working: bool, result: Dict,
+                             create: bool = True) -> Optional[Dict]:
+        """Update the health record of a proxy after a check and return it.
+
+        With ``create=False`` a proxy without a record does not get one.
+        """
+        if not create and proxy not in self.proxy_health:
+            return None
+        health = self.proxy_health.setdefault(proxy, {
+            "checks": 0,
+            "passes": 0,
+            "streak": 0,
+            "consecutive_failures": 0,
+            "last_latency": None,
+            "last_checked": None
+        })
+        health["checks"] += 1
+        health["last_checked"] = time.time()
+        if is_working:
+            health["passes"] += 1
+            health["streak"] += 1
+            health["consecutive_failures"] = 0
+            health["last_latency"] = result.get("latency")
+        else:
+            health["streak"] = 0
+            health["consecutive_failures"] += 1
+        return health
+
+    def _recently_verified(self, proxy: str) -> bool:
+        """Whether the last check of a proxy passed within the longest re-check interval."""
+        health = self.proxy_health.get(proxy)
+        if not health or health.get("consecutive_failures") or not health.get("passes"):
+            return False
+        return time.time() - (health.get("last_checked") or 0) < self.revalidation_settings["max_interval"]
+
+    def _next_check_interval(self, health: Dict) -> Optional[float]:
+        """Seconds until the next check of a proxy, or None if it should be dropped."""
+        settings = self.revalidation_settings
+        failures = health["consecutive_failures"]
+        if failures:
+            if failures >= settings["max_failures"]:
+                return None
+            # Dead or unreachable: exponential backoff until dropped
+            return settings["retry_interval"] * (2 ** (failures - 1))
+
+        if health["passes"] / health["checks"] < settings["flaky_pass_rate"]:
+            return settings["flaky_interval"]
+
+        # Stable: back off the longer the proxy keeps passing
+        interval = settings["base_interval"] * (2 ** (health["streak"] - 1))
+        latency = health.get("last_latency")
+        if latency is not None and latency > settings["slow_latency"]:
+            interval = min(interval, settings["max_interval"] / 2)
+        return min(interval, settings["max_interval"])
+
+    async def revalidate_continuously(self, max_workers: int = 20, duration: Optional[float] = None,
+                                      snapshot_path: Optional[Union[str, Path]] = None,
+                                      snapshot_interval: float = 30, stop: Optional[asyncio.Event] = None):
+        """Keep the working proxy pool fresh by re-checking each proxy when it is due.
+
+        Proxies sit in a heap keyed by their next check time. Stable fast proxies
+        are re-checked rarely, flaky ones often, and failing ones with exponential
+        backoff until they are dropped from the pool. Runs until ``duration``
+        seconds have elapsed, ``stop`` is set or Ctrl+C is pressed. With ``snapshot_path``, the
+        pool is republished as a binary snapshot at most every
+        ``snapshot_interval`` seconds while it changes.
+        """
+        pool = {}
+        for entry in self.working_proxies:
+            if isinstance(entry, dict):
+                pool[entry["proxy"]] = entry
+            else:
+                pool[entry] = {"proxy": entry}
+
+        if not pool:
+            console.print("[yellow]No proxies to re-validate. Scrape some first![/yellow]")
+            return
+
+        self.metrics.set("grass_proxy_pool_size", len(pool))
+        console.print(f"\n[bold blue]♻ Re-validating {len(pool)} proxies continuously...[/bold blue]")
+        console.print("[blue]Press Ctrl+C to stop[/blue]")
+
+        now = time.monotonic()
+        # Spread the first round over a few seconds instead of probing everything at once
+        heap = [(now + i * 0.05, proxy) for i, proxy in enumerate(pool)]
+        heapq.heapify(heap)
+        deadline = now + duration if duration else None
+        semaphore = asyncio.Semaphore(max_workers)
+        in_flight = set()
+        checks = 0
+        dropped = 0
+        pool_changed = False
+        last_snapshot = 0.0
+
+        def publish_snapshot():
+            nonlocal pool_changed, last_snapshot
+            proxies = list(pool.values())
+            for members in self.standby_proxies.values():
+                proxies.extend(dict(member, standby=True) for member in members)
+            self.save_pool_snapshot(proxies, snapshot_path)
+            pool_changed = False
+            last_snapshot = time.monotonic()
+
+        async def check(proxy: str, session: aiohttp.ClientSession):
+            nonlocal checks, dropped, pool_changed
+            async with semaphore:
+                is_working, result = await self.test_proxy(proxy, session)
+            checks += 1
+            pool_changed = True
+            health = self._record_proxy_health(proxy, is_working, result)
+            interval = self._next_check_interval(health)
+            if is_working:
+                pool[proxy] = dict(pool.get(proxy, {}), **result)
+                console.print(f"[green]✓[/green] {proxy} - next check in {interval:.0f}s")
+            elif interval is None:
+                entry = pool.pop(proxy, {})
+                dropped += 1
+                console.print(f"[red]✗[/red] {proxy} - dropped after {health['consecutive_failures']} failures")
+                standbys = self.standby_proxies.get(entry.get("cluster"))
+                if standbys:
+                    # Keep the egress point covered by promoting the next fastest member
+                    standby = standbys.pop(0)
+                    standby["cluster_size"] = entry.get("cluster_size", 1) - 1
+                    pool[standby["proxy"]] = standby
+                    heapq.heappush(heap, (time.monotonic(), standby["proxy"]))
+                    console.print(f"[blue]↑[/blue] {standby['proxy']} promoted for cluster {entry['cluster']}")
+                self.metrics.set("grass_proxy_pool_size", len(pool))
+            else:
+                console.print(f"[yellow]⚠[/yellow] {proxy} - retry in {interval:.0f}s")
+            if interval is not None:
+                heapq.heappush(heap, (time.monotonic() + interval, proxy))
+
+        stop = stop or asyncio.Event()
+        self._reset_probe_timeouts()
+        with stop_on_interrupt(stop):
+            try:
+                async with self.http.session("probes") as session:
+                    while (heap or in_flight) and not stop.is_set():
+                        now = time.monotonic()
+                        if deadline and now >= deadline:
+                            break
+                        if snapshot_path and pool_changed and now - last_snapshot >= snapshot_interval:
+                            publish_snapshot()
+                        if heap and heap[0][0] <= now:
+                            _, proxy = heapq.heappop(heap)
+                            task = asyncio.create_task(check(proxy, session))
+                            in_flight.add(task)
+                            task.add_done_callback(in_flight.discard)
+                            continue
+                        # Sleep until the next proxy is due, waking up regularly so
+                        # results pushed by in-flight checks are picked up
+                        wait = heap[0][0] - now if heap else 1.0
+                        if deadline:
+                            wait = min(wait, deadline - now)
+                        try:
+                            await asyncio.wait_for(stop.wait(), timeout=min(wait, 1.0))
+                        except asyncio.TimeoutError:
+                            pass
+            finally:
+                for task in list(in_flight):
+                    task.cancel()
+                self.working_proxies = list(pool.values())
+                self._save_proxy_health()
+                if snapshot_path and pool_changed:
+                    publish_snapshot()
+                console.print(
+                    f"\n[bold green]✅ Re-validation stopped after {checks} checks: "
+                    f"{len(self.working_proxies)} proxies in pool, {dropped} dropped[/bold green]"
+                )
+
+    def _exit_ip(self, result: Dict) -> Optional[str]:
+        """Exit IP seen by the judge; the last hop when the proxy forwards the client address."""
+        origin = result.get("ip")
+        if not origin or origin == "Unknown":
+            return None
+        return origin.split(",")[-1].strip()
+
+    async def lookup_asns(self, ips: List[str]) -> Dict[str, str]:
+        """Look up the AS of each IP through the ip-api.com batch endpoint (100 IPs per request)."""
+        asns = {}
+        unique_ips = list(dict.fromkeys(ips))
+        timeout = aiohttp.ClientTimeout(total=15)
+        async with self.http.session("sources") as session:
+            for i in range(0, len(unique_ips), 100):
+                chunk = unique_ips[i:i + 100]
+                try:
+                    async with session.post("http://ip-api.com/batch?fields=query,as", json=chunk,
+                                            timeout=timeout) as response:
+                        if response.status == 200:
+                            for entry in await response.json():
+                                if entry.get("as"):
+                                    # "AS13335 Cloudflare, Inc." -> "AS13335"
+                                    asns[entry["query"]] = entry["as"].split()[0]
+                        else:
+                            console.print(f"[yellow]Warning: ASN lookup returned HTTP {response.status}[/yellow]")
+                except Exception as e:
+                    console.print(f"[yellow]Warning: ASN lookup failed: {e}[/yellow]")
+                if i + 100 < len(unique_ips):
+                    await asyncio.sleep(4)  # ip-api allows 15 batch requests per minute
+        return asns
+
+    def cluster_by_exit_ip(self, proxies: Sequence[Dict], granularity: str = "ip",
+                           asns: Optional[Dict[str, str]] = None) -> Dict[str, List[Dict]]:
+        """Group verified proxies by exit IP, exit /24 subnet or exit ASN, fastest first."""
+        clusters = {}
+        for proxy in proxies:
+            exit_ip = self._exit_ip(proxy)
+            if exit_ip is None:
+                # Unknown egress, keep it on its own
+                key = proxy["proxy"]
+            elif granularity == "subnet" and exit_ip.count(".") == 3:
+                key = exit_ip.rsplit(".", 1)[0] + ".0/24"
+            elif granularity == "asn" and asns and exit_ip in asns:
+                key = asns[exit_ip]
+            else:
+                key = exit_ip
+            clusters.setdefault(key, []).append(proxy)
+        for members in clusters.values():
+            members.sort(key=lambda p: p.get("latency") if p.get("latency") is not None else float("inf"))
+        return clusters
+
+    def effective_pool_size(self, proxies: Optional[Sequence[Dict]] = None) -> int:
+        """Number of distinct exit IPs among verified proxies."""
+        proxies = self.working_proxies if proxies is None else proxies
+        return len(self.cluster_by_exit_ip([p for p in proxies if isinstance(p, dict)]))
+
+    async def collapse_redundant_proxies(self, granularity: str = "ip") -> List[Dict]:
+        """Keep the fastest proxy per egress cluster and hold the rest as standbys.
+
+        The re-validation scheduler then only spends checks on distinct egress
+        points, promoting the next standby of a cluster when its representative
+        is dropped.
+        """
+        verified = [p for p in self.working_proxies if isinstance(p, dict) and "proxy" in p]
+        # Re-clustering considers the standbys of a previous collapse as well, but
+        # they are not re-checked by the scheduler: keep only those whose last
+        # check passed recently and never prefer them over a pool member
+        known = {p["proxy"] for p in verified}
+        standbys = set()
+        for members in self.standby_proxies.values():
+            for member in members:
+                if member["proxy"] not in known and self._recently_verified(member["proxy"]):
+                    verified.append(member)
+                    standbys.add(member["proxy"])
+        if not verified:
+            console.print("[yellow]No verified proxies to cluster. Test some first![/yellow]")
+            return []
+
+        asns = None
+        if granularity == "asn":
+            console.print("[blue]Looking up exit ASNs...[/blue]")
+            asns = await self.lookup_asns([ip for ip in map(self._exit_ip, verified) if ip])
+
+        clusters = self.cluster_by_exit_ip(verified, granularity, asns)
+        representatives = []
+        self.standby_proxies = {}
+        for key, members in clusters.items():
+            members.sort(key=lambda p: p["proxy"] in standbys)  # stable, so still fastest first
+            for member in members:
+                member["cluster"] = key
+            representative = members[0]
+            representative["cluster_size"] = len(members)
+            representatives.append(representative)
+            if len(members) > 1:
+                self.standby_proxies[key] = members[1:]
+
+        table = Table(title=f"Largest exit clusters (by {granularity})")
+        table.add_column("Cluster", style="cyan")
+        table.add_column("Proxies", style="green")
+        table.add_column("Representative", style="white")
+        table.add_column("Latency", style="white")
+        for representative in sorted(representatives, key=lambda p: p["cluster_size"], reverse=True)[:10]:
+            table.add_row(
+                representative["cluster"], str(representative["cluster_size"]),
+                representative["proxy"], f"{representative.get('latency', '?')}s"
+            )
+        console.print(table)
+
+        self.working_proxies = representatives
+        self.metrics.set("grass_proxy_effective_pool_size", len(representatives))
+        self.metrics.set("grass_proxy_pool_size", len(representatives))
+        console.print(
+            f"\n[bold green]✅ Effective pool size: {len(representatives)} distinct egress points "
+            f"from {len(verified)} verified proxies[/bold green]"
+        )
+        return representatives
+
+    async def start_judge_server(self, host: str = "0.0.0.0", port: int = 8899,
+                                 payload_bytes: int = 1_000_000) -> Tuple[web.AppRunner, str]:
+        """Serve a payload of ``payload_bytes`` for bandwidth benchmarks; returns the runner and URL path.
+
+        The path holds a random token, so only clients that were given the URL
+        (the proxies being benchmarked) can pull from the judge, and the size
+        is fixed by the benchmark rather than chosen by the client.
+        """
+        if not 0 < payload_bytes <= JUDGE_MAX_PAYLOAD:
+            raise ValueError(f"payload_bytes must be between 1 and {JUDGE_MAX_PAYLOAD}")
+        chunk = os.urandom(64 * 1024)  # incompressible, so proxies cannot shrink it
+        path = f"/payload/{secrets.token_urlsafe(16)}"
+
+        async def handle_payload(request: web.Request) -> web.StreamResponse:
+            size = payload_bytes
+            response = web.StreamResponse(headers={
+                "Content-Type": "application/octet-stream",
+                "Content-Length": str(size),
+                "Cache-Control": "no-store"
+            })
+            await response.prepare(request)
+            remaining = size
+            while remaining > 0:
+                await response.write(chunk[:min(remaining, len(chunk))])
+                remaining -= len(chunk)
+            await response.write_eof()
+            return response
+
+        app = web.Application()
+        app.router.add_get(path, handle_payload)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner, path
+
+    async def _public_ip(self) -> Optional[str]:
+        """This host's public IP as seen by the judge, without a proxy."""
+        try:
+            timeout = aiohttp.ClientTimeout(total=10)
+            async with self.http.session("sources") as session:
+                async with session.get("http://httpbin.org/ip", timeout=timeout) as response:
+                    data = await response.json()
+                    return data.get("origin", "").split(",")[0].strip() or None
+        except Exception:
+            return None
+
+    async def measure_throughput(self, proxy: str, session: aiohttp.ClientSession, url: str,
+                                 timeout: float = 30) -> Dict:
+        """Download url through a proxy and measure time-to-first-byte and sustained throughput.
+
+        Throughput counts the bytes after the first chunk over the time after
+        it arrived, so connection setup does not dilute it. A transfer cut off
+        by the timeout still reports the rate reached so far.
+        """
+        result = {"proxy": proxy, "ttfb": None, "throughput_bps": 0.0, "bytes": 0, "complete": False}
+        start = time.monotonic()
+        first_byte = None
+        first_chunk = 0
+        try:
+            client_timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=self.proxy_timeout_settings["connect"])
+            async with session.get(url, proxy=f"http://{proxy}", timeout=client_timeout) as response:
+                if response.status != 200:
+                    result["error"] = f"HTTP {response.status}"
+                    return result
+                async for chunk in response.content.iter_any():
+                    if first_byte is None:
+                        first_byte = time.monotonic()
+                        first_chunk = len(chunk)
+                        result["ttfb"] = round(first_byte - start, 3)
+                    result["bytes"] += len(chunk)
+                result["complete"] = True
+        except asyncio.TimeoutError:
+            result["error"] = "Timeout"
+        except Exception:
+            result["error"] = "Failed"
+        if first_byte is not None:
+            elapsed = time.monotonic() - first_byte
+            if elapsed > 0:
+                result["throughput_bps"] = round((result["bytes"] - first_chunk) / elapsed, 1)
+        return result
+
+    async def benchmark_bandwidth(self, proxies: Optional[List[Dict]] = None, judge_url: Optional[str] = None,
+                                  payload_bytes: int = 1_000_000, max_workers: int = 10,
+                                  timeout: float = 30, judge_port: int = 8899) -> List[Dict]:
+        """Measure throughput of verified proxies by pulling a fixed-size payload through each.
+
+        Without ``judge_url`` the bundled judge is started on ``judge_port`` and
+        addressed through this host's public IP, which proxies must be able to
+        reach. Runs with its own concurrency so it does not starve liveness
+        tests. Results are stored on the proxy entries as ``throughput_bps``
+        and ``ttfb``.
+        """
+        proxies = [p for p in (self.working_proxies if proxies is None else proxies) if isinstance(p, dict)]
+        if not proxies:
+            console.print("[yellow]No verified proxies to benchmark. Test some first![/yellow]")
+            return []
+        if not 0 < payload_bytes <= JUDGE_MAX_PAYLOAD:
+            console.print(f"[red]Payload size must be between 1 byte and {JUDGE_MAX_PAYLOAD // 1_000_000} MB[/red]")
+            return []
+
+        judge_runner = None
+        if judge_url is None:
+            public_ip = await self._public_ip()
+            if public_ip is None:
+                console.print("[red]Could not determine this host's public IP, pass a judge URL instead[/red]")
+                return []
+            judge_runner, judge_path = await self.start_judge_server(port=judge_port, payload_bytes=payload_bytes)
+            url = f"http://{public_ip}:{judge_port}{judge_path}"
+            console.print(f"[blue]Bundled judge listening on port {judge_port}[/blue]")
+        else:
+            separator = "&" if "?" in judge_url else "?"
+            url = f"{judge_url}{separator}bytes={payload_bytes}"
+
+        console.print(f"\n[bold blue]📶 Benchmarking {len(proxies)} proxies with "
+                      f"{payload_bytes / 1_000_000:g} MB each...[/bold blue]")
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def benchmark(entry: Dict, session: aiohttp.ClientSession) -> Dict:
+            async with semaphore:
+                return await self.measure_throughput(entry["proxy"], session, url, timeout)
+
+        try:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+                console=console
+            ) as progress:
+                task = progress.add_task("Benchmarking proxies...", total=len(proxies))
+                entries = {entry["proxy"]: entry for entry in proxies}
+                async with self.http.session("probes") as session:
+                    for coro in asyncio.as_completed([benchmark(entry, session) for entry in proxies]):
+                        result = await coro
+                        entry = entries[result["proxy"]]
+                        entry["throughput_bps"] = result["throughput_bps"]
+                        entry["ttfb"] = result["ttfb"]
+                        if result["ttfb"] is not None:
+                            self.metrics.observe("grass_proxy_ttfb_seconds", result["ttfb"])
+                            self.metrics.observe("grass_proxy_throughput_bytes_per_second", result["throughput_bps"])
+                        if result["complete"]:
+                            console.print(f"[green]✓[/green] {result['proxy']} - "
+                                          f"{result['throughput_bps'] / 1000:.1f} KB/s, TTFB {result['ttfb']}s")
+                        else:
+                            console.print(f"[red]✗[/red] {result['proxy']} - {result.get('error', 'Failed')} "
+                                          f"({result['throughput_bps'] / 1000:.1f} KB/s so far)")
+                        progress.advance(task)
+        finally:
+            if judge_runner is not None:
+                await judge_runner.cleanup()
+
+        ranked = self.select_proxies(len(proxies), rank_by="throughput", proxies=proxies)
+        table = Table(title="Fastest proxies by throughput")
+        table.add_column("Proxy", style="cyan")
+        table.add_column("Throughput", style="green")
+        table.add_column("TTFB", style="white")
+        for entry in ranked[:10]:
+            table.add_row(entry["proxy"], f"{entry['throughput_bps'] / 1000:.1f} KB/s", f"{entry['ttfb']}s")
+        console.print(table)
+        return ranked
+
+    def select_proxies(self, count: int, rank_by: str = "latency",
+                       proxies: Optional[Sequence[Dict]] = None) -> List[Dict]:
+        """Best ``count`` verified proxies ranked by lowest latency or highest measured throughput."""
+        proxies = [p for p in (self.working_proxies if proxies is None else proxies) if isinstance(p, dict)]
+        if rank_by == "throughput":
+            ranked = sorted(
+                (p for p in proxies if p.get("throughput_bps")),
+                key=lambda p: p["throughput_bps"], reverse=True
+            )
+        else:
+            ranked = sorted(
+                (p for p in proxies if p.get("latency") is not None),
+                key=lambda p: p["latency"]
+            )
+        return ranked[:count]
+
+    async def run_coordinator(self, host: str = "0.0.0.0", port: int = 8765, batch_size: int = 200,
+                              lease_ttl: float = 120, candidates: Optional[List[str]] = None,
+                              token: Optional[str] = None) -> List[Dict]:
+        """Hand out leased batches of candidates to remote workers and collect their results.
+
+        Workers lease a batch with POST /lease, stream results back with POST
+        /results and mark the lease finished with ``"final": true``. Every
+        results post renews the lease; candidates of leases that are not renewed
+        within ``lease_ttl`` seconds go back to the queue for another worker.
+        Every route requires ``Authorization: Bearer <token>``; a token is
+        generated and printed when none is given.
+        """
+        if candidates is None:
+            candidates = await self.scrape_proxies()
+        # Batches hold whole /24s, so a worker's subnet sampling sees every member
+        pending = deque(sorted(dict.fromkeys(candidates), key=lambda c: SubnetProbePlanner._split(c)[0]))
+        total = len(pending)
+        known = set(pending)
+        leases = {}
+        results = {}
+        finished = asyncio.Event()
+        if not token:
+            token = secrets.token_urlsafe(16)
+            console.print(f"[blue]Worker token: {token}[/blue]")
+        expected_auth = f"Bearer {token}".encode("utf-8")
+        # Idle workers poll again after this long, so the coordinator stays up
+        # a little longer than that once done for every worker to hear it
+        idle_wait = min(5.0, lease_ttl / 4)
+
+        console.print(f"\n[bold blue]🛰 Coordinating {total} candidates on {host}:{port} "
+                      f"(batch {batch_size}, lease {lease_ttl:.0f}s)[/bold blue]")
+
+        @web.middleware
+        async def require_token(request: web.Request, handler):
+            supplied = request.headers.get("Authorization", "").encode("utf-8")
+            if not hmac.compare_digest(supplied, expected_auth):
+                return web.json_response({"error": "unauthorized"}, status=401)
+            return await handler(request)
+
+        async def read_body(request: web.Request) -> Dict:
+            try:
+                body = await request.json()
+            except ValueError:
+                raise web.HTTPBadRequest(text="Body is not valid JSON")
+            if not isinstance(body, dict):
+                raise web.HTTPBadRequest(text="Body must be a JSON object")
+            return body
+
+        def reclaim_expired_leases():
+            now = time.monotonic()
+            for lease_id, lease in list(leases.items()):
+                if lease["expires"] <= now:
+                    del leases[lease_id]
+                    remaining = [c for c in lease["remaining"] if c not in results]
+                    pending.extendleft(reversed(remaining))
+                    console.print(f"[yellow]⚠[/yellow] Lease {lease_id[:8]} of {lease['worker']} expired, "
+                                  f"re-queued {len(remaining)} candidates")
+            if not pending and not leases:
+                finished.set()
+
+        async def handle_lease(request: web.Request) -> web.Response:
+            body = await read_body(request)
+            try:
+                size = min(int(body.get("size") or batch_size), batch_size)
+            except (TypeError, ValueError):
+                raise web.HTTPBadRequest(text="size must be an integer")
+            reclaim_expired_leases()
+            if finished.is_set():
+                return web.json_response({"done": True})
+
+            batch = []
+            while pending and len(batch) < size:
+                candidate = pending.popleft()
+                if candidate not in results:
+                    batch.append(candidate)
+            if not batch:
+                # Everything is leased out, ask the worker to come back in case a lease expires
+                return web.json_response({"wait": idle_wait})
+
+            lease_id = uuid.uuid4().hex
+            leases[lease_id] = {
+                "worker": str(body.get("worker", request.remote)),
+                "remaining": set(batch),
+                "expires": time.monotonic() + lease_ttl
+            }
+            return web.json_response({"lease_id": lease_id, "candidates": batch, "ttl": lease_ttl})
+
+        async def handle_results(request: web.Request) -> web.Response:
+            body = await read_body(request)
+            items = body.get("results", [])
+            skipped = body.get("skipped", [])
+            if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+                raise web.HTTPBadRequest(text="results must be a list of objects")
+            if not isinstance(skipped, list):
+                raise web.HTTPBadRequest(text="skipped must be a list")
+            lease = leases.get(body.get("lease_id"))
+            for proxy in skipped:
+                # Left untested by the worker's subnet sampling: settled, but no health record
+                if isinstance(proxy, str) and proxy in known and proxy not in results:
+                    results[proxy] = (False, {"proxy": proxy, "error": "Skipped"})
+                    if lease:
+                        lease["remaining"].discard(proxy)
+            for item in items:
+                proxy = item.get("proxy")
+                # Only candidates this coordinator handed out can enter the pool
+                if not isinstance(proxy, str) or proxy not in known or proxy in results:
+                    continue
+                is_working = bool(item.pop("working", False))
+                results[proxy] = (is_working, item)
+                self._record_proxy_health(proxy, is_working, item, create=is_working)
+                self._record_source_yield(proxy, is_working)
+                if lease:
+                    lease["remaining"].discard(proxy)
+
+            if lease:
+                lease["expires"] = time.monotonic() + lease_ttl
+                if body.get("final"):
+                    del leases[body["lease_id"]]
+                    # Anything the worker did not report goes back to the queue
+                    pending.extendleft(reversed([c for c in lease["remaining"] if c not in results]))
+            if not pending and not leases:
+                finished.set()
+            return web.json_response({"ok": True, "known_lease": lease is not None})
+
+        async def handle_status(request: web.Request) -> web.Response:
+            return web.json_response({
+                "total": total,
+                "pending": len(pending),
+                "leased": sum(len(lease["remaining"]) for lease in leases.values()),
+                "tested": len(results),
+                "working": sum(1 for is_working, _ in results.values() if is_working),
+                "workers": sorted({lease["worker"] for lease in leases.values()})
+            })
+
+        app = web.Application(client_max_size=64 * 1024 * 1024, middlewares=[require_token])
+        app.router.add_post("/lease", handle_lease)
+        app.router.add_post("/results", handle_results)
+        app.router.add_get("/status", handle_status)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+
+        try:
+            if not total:
+                finished.set()
+            while not finished.is_set():
+                try:
+                    await asyncio.wait_for(finished.wait(), timeout=max(1.0, lease_ttl / 4))
+                except asyncio.TimeoutError:
+                    reclaim_expired_leases()
+                    console.print(f"[blue]Progress: {len(results)}/{total} tested, "
+                                  f"{len(leases)} active leases[/blue]")
+            # Give polling workers time to receive the done signal
+            await asyncio.sleep(idle_wait + 5)
+        finally:
+            await runner.cleanup()
+            self._save_proxy_health()
+            self._save_source_stats()
+
+        working_proxies = [result for is_working, result in results.values() if is_working]
+        self.working_proxies = working_proxies
+        self.standby_proxies = {}
+        self.commit_source_snapshots(results)
+        self.metrics.set("grass_proxy_pool_size", len(working_proxies))
+        console.print(f"\n[bold green]✅ Working proxies: {len(working_proxies)}/{total}[/bold green]")
+        return working_proxies
+
+    async def run_worker(self, coordinator_url: str, batch_size: int = 200, max_workers: int = 50,
+                         flush_interval: float = 2.0, token: str = "", max_failures: int = 3):
+        """Lease batches from a coordinator, test them and stream results back until it is done.
+
+        Before the coordinator was first reached the worker keeps retrying;
+        afterwards it gives up after ``max_failures`` consecutive failed lease
+        requests, as the coordinator exits once every candidate is tested.
+        """
+        coordinator_url = coordinator_url.rstrip("/")
+        worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        timeout = aiohttp.ClientTimeout(total=60)
+        headers = {"Authorization": f"Bearer {token}"}
+        console.print(f"\n[bold blue]🛰 Worker {worker_id} connecting to {coordinator_url}[/bold blue]")
+        # Batches are too small to learn probe budgets from on their own, so
+        # latencies observed by earlier batches carry over for the whole process
+        self._reset_probe_timeouts()
+
+        async with self.http.session("sources") as session:
+
+            async def post_results(lease_id: str, buffer: List[Dict], skipped: List[str], final: bool = False):
+                async with session.post(f"{coordinator_url}/results", json={
+                    "lease_id": lease_id, "results": buffer, "skipped": skipped, "final": final
+                }, headers=headers, timeout=timeout) as response:
+                    response.raise_for_status()
+
+            connected = False
+            failures = 0
+            while True:
+                try:
+                    async with session.post(f"{coordinator_url}/lease", json={
+                        "worker": worker_id, "size": batch_size
+                    }, headers=headers, timeout=timeout) as response:
+                        response.raise_for_status()
+                        lease = await response.json()
+                    connected = True
+                    failures = 0
+                except Exception as e:
+                    if isinstance(e, aiohttp.ClientResponseError) and e.status == 401:
+                        console.print("[red]Coordinator rejected the worker token, check --token[/red]")
+                        return
+                    failures += 1
+                    if connected and failures >= max_failures:
+                        console.print(f"[yellow]Coordinator gone after {failures} failed requests, "
+                                      f"assuming it finished[/yellow]")
+                        return
+                    console.print(f"[yellow]⚠[/yellow] Coordinator unreachable: {e}")
+                    await asyncio.sleep(5)
+                    continue
+
+                if lease.get("done"):
+                    console.print("[bold green]✅ Coordinator reports all candidates tested[/bold green]")
+                    return
+                if "wait" in lease:
+                    await asyncio.sleep(lease["wait"])
+                    continue
+
+                lease_id = lease["lease_id"]
+                buffer = []
+                skipped = []
+
+                def collect(is_working: bool, result: Dict):
+                    buffer.append(dict(result, working=is_working))
+
+                async def flush_periodically():
+                    while True:
+                        await asyncio.sleep(flush_interval)
+                        if buffer or skipped:
+                            chunk, skipped_chunk = buffer[:], skipped[:]
+                            del buffer[:len(chunk)], skipped[:len(skipped_chunk)]
+                            await post_results(lease_id, chunk, skipped_chunk)
+
+                # Report candidates skipped by subnet sampling so they are not re-issued
+                planner = SubnetProbePlanner(**self.probe_planner_settings, on_skip=skipped.extend)
+                flusher = asyncio.create_task(flush_periodically())
+                try:
+                    await self.test_proxies(lease["candidates"], max_workers, on_result=collect, planner=planner,
+                                            reset_timeouts=False)
+                finally:
+                    flusher.cancel()
+                    try:
+                        await flusher
+                    except (asyncio.CancelledError, Exception):
+                        pass
+                try:
+                    await post_results(lease_id, buffer, skipped, final=True)
+                except Exception as e:
+                    # The lease will expire and its candidates will be re-issued
+                    console.print(f"[yellow]⚠[/yellow] Could not report results: {e}")
+
     def scrape_captcha_keys_from_file(self, file_path: str) -> List[str]:
         keys = []
         try:
@@ -443,7 +2592,7 @@ class ProxyCaptchaScraper:
         ) as progress:
             task = progress.add_task("Testing captcha keys...", total=len(keys))
 
-            async with aiohttp.ClientSession() as session:
+            async with self.http.session("sources") as session:
                 tasks = [test_with_semaphore(key, session) for key in keys]
 
                 for coro in asyncio.as_completed(tasks):
@@ -459,6 +2608,7 @@ class ProxyCaptchaScraper:
         console.print(f"\n[bold green]✅ Working captcha keys: {len(working_keys)}/{len(keys)}[/bold green]")
         return working_keys
 
+    @profiled_stage("search_online_sources")
     async def search_online_sources(self, search_type: str = "proxies") -> List[str]:
         """Automatically search online for new proxy or captcha sources"""
         console.print(f"\n[bold blue]🔍 Auto-searching online for {search_type} sources...[/bold blue]")
@@ -479,7 +2629,7 @@ class ProxyCaptchaScraper:
         ) as progress:
             task = progress.add_task("Searching online sources...", total=len(search_terms))
 
-            async with aiohttp.ClientSession() as session:
+            async with self.http.session("sources") as session:
                 for term in search_terms:
                     try:
                         # Search GitHub repositories with shorter timeout
@@ -530,6 +2680,7 @@ class ProxyCaptchaScraper:
         console.print(f"\n[bold green]✅ Discovered {len(discovered_list)} potential {search_type} sources[/bold green]")
         return discovered_list
 
+    @profiled_stage("validate_discovered_sources")
     async def validate_discovered_sources(self, sources: List[str], source_type: str) -> List[str]:
         """Validate discovered sources by checking if they return valid content"""
         console.print(f"\n[bold blue]🔍 Validating discovered {source_type} sources...[/bold blue]")
@@ -546,7 +2697,7 @@ class ProxyCaptchaScraper:
         ) as progress:
             task = progress.add_task("Validating sources...", total=len(sources_to_validate))
 
-            async with aiohttp.ClientSession() as session:
+            async with self.http.session("sources") as session:
                 # Use semaphore to limit concurrent requests
                 semaphore = asyncio.Semaphore(10)  # Max 10 concurrent requests
                 
@@ -591,9 +2742,15 @@ class ProxyCaptchaScraper:
                     
                     progress.advance(task)
 
+        self.metrics.inc("grass_discovery_candidates_total", len(sources_to_validate), source_type=source_type)
+        self.metrics.inc("grass_discovery_validated_total", len(valid_sources), source_type=source_type)
+        if sources_to_validate:
+            self.metrics.set("grass_discovery_hit_ratio", len(valid_sources) / len(sources_to_validate),
+                             source_type=source_type)
         console.print(f"\n[bold green]✅ Validated {len(valid_sources)} working {source_type} sources[/bold green]")
         return valid_sources
 
+    @profiled_stage("save_discovered_sources")
     def save_discovered_sources(self, source_type: str):
         """Save discovered sources to a file for future use"""
         downloads_folder = self.get_downloads_folder()
@@ -673,6 +2830,7 @@ class ProxyCaptchaScraper:
         
         return valid_sources
 
+    @profiled_stage("save_results")
     def save_results(self, filename: Optional[str] = None):
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -694,6 +2852,7 @@ class ProxyCaptchaScraper:
         except Exception as e:
             console.print(f"[red]Error saving results: {e}[/red]")
 
+    @profiled_stage("save_proxies_to_downloads")
     def save_proxies_to_downloads(self, proxies: Sequence[Union[str, Dict]], format_type: str = "txt"):
         """Save proxies to Downloads folder in specified format"""
         downloads_folder = self.get_downloads_folder()
@@ -723,6 +2882,80 @@ class ProxyCaptchaScraper:
             except Exception as e:
                 console.print(f"[red]Error saving proxies: {e}[/red]")
 
+        elif format_type == "bin":
+            self.save_pool_snapshot(proxies)
+
+    @profiled_stage("save_pool_snapshot")
+    def save_pool_snapshot(self, proxies: Optional[Sequence[Union[str, Dict]]] = None,
+                           path: Optional[Union[str, Path]] = None) -> Optional[Path]:
+        """Write the pool as a binary snapshot that consumer processes can mmap (see PoolSnapshot).
+
+        Records are sorted fastest first. The file is replaced atomically by
+        rename and its header generation is incremented on every write.
+        Defaults to the working pool plus standbys in Downloads/grass_pool.bin.
+        """
+        if proxies is None:
+            proxies = list(self.working_proxies)
+            for members in self.standby_proxies.values():
+                proxies.extend(dict(member, standby=True) for member in members)
+        path = Path(path) if path else self.get_downloads_folder() / "grass_pool.bin"
+
+        records = []
+        invalid = 0
+        for proxy in proxies:
+            entry = proxy if isinstance(proxy, dict) else {"proxy": proxy}
+            host, _, port = entry.get("proxy", "").rpartition(":")
+            try:
+                packed = socket.inet_aton(host)
+                port = int(port)
+                if host.count(".") != 3 or not 0 < port < 65536:
+                    raise ValueError(host)
+            except (OSError, ValueError):
+                invalid += 1
+                continue
+            flags = 0
+            verified = isinstance(proxy, dict) and "error" not in proxy
+            if entry.get("standby"):
+                # Standbys are not re-checked by the scheduler
+                verified = verified and self._recently_verified(entry["proxy"])
+            if verified:
+                flags |= SNAPSHOT_FLAG_VERIFIED
+            if entry.get("standby"):
+                flags |= SNAPSHOT_FLAG_STANDBY
+            elif "cluster" in entry:
+                flags |= SNAPSHOT_FLAG_REPRESENTATIVE
+            latency = entry.get("latency")
+            latency_ms = min(int(latency * 1000), 0xFFFFFFFF) if isinstance(latency, (int, float)) else 0xFFFFFFFF
+            throughput_kbps = min(int(entry.get("throughput_bps") or 0) // 1000, 0xFFFFFFFF)
+            protocol = SNAPSHOT_PROTOCOLS.get(entry.get("protocol", "http"), SNAPSHOT_PROTOCOLS["http"])
+            records.append((latency_ms, SNAPSHOT_RECORD.pack(packed, port, protocol, flags, latency_ms, throughput_kbps)))
+        records.sort(key=lambda record: record[0])
+
+        previous = PoolSnapshot.read_header(path)
+        generation = previous["generation"] + 1 if previous else 1
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, SNAPSHOT_RECORD.size,
+                                             generation, time.time(), len(records)))
+                f.writelines(record for _, record in records)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except Exception as e:
+            console.print(f"[red]Error saving pool snapshot: {e}[/red]")
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            return None
+
+        if invalid:
+            console.print(f"[yellow]Skipped {invalid} entries that are not IPv4 ip:port[/yellow]")
+        console.print(f"[green]✅ Pool snapshot (generation {generation}, {len(records)} proxies) saved to: {path}[/green]")
+        return path
+
+    @profiled_stage("save_captcha_keys_to_downloads")
     def save_captcha_keys_to_downloads(self, keys: Sequence[Union[str, Dict]], format_type: str = "txt"):
         """Save captcha keys to Downloads folder in specified format"""
         downloads_folder = self.get_downloads_folder()
@@ -752,34 +2985,98 @@ class ProxyCaptchaScraper:
             except Exception as e:
                 console.print(f"[red]Error saving captcha keys: {e}[/red]")
 
-    def load_from_files(self):
+    def iter_candidates_from_file(self, path: Union[str, Path], chunk_size: int = 4 * 1024 * 1024,
+                                  error_rate: float = 0.001):
+        """Lazily yield unique IPv4 ip:port candidates from a plain or gzip file of any size.
+
+        Plain files are memory-mapped and gzip files streamed, both parsed in
+        ``chunk_size`` pieces. Duplicates are dropped with a Bloom filter sized
+        from the (uncompressed) file size that grows if the estimate is short,
+        so memory stays proportional to the number of distinct candidates at
+        about 2 bytes each.
+        """
+        path = Path(path).expanduser()
+        file_size = path.stat().st_size
+        with open(path, 'rb') as f:
+            is_gzip = f.read(2) == b"\x1f\x8b"
+            data_size = file_size
+            if is_gzip and file_size >= 18:
+                # ISIZE trailer: uncompressed size of the last member, modulo 4 GiB
+                f.seek(-4, os.SEEK_END)
+                data_size = max(file_size, struct.unpack("<I", f.read(4))[0])
+        # ~16 bytes per "ip:port\n" line; the filter grows if that underestimates
+        seen = ScalableBloomFilter(data_size // 16, error_rate)
+        pattern = re.compile(rb'(?:\d{1,3}\.){3}\d{1,3}:\d+')
+
+        def chunks():
+            if is_gzip:
+                with gzip.open(path, 'rb') as f:
+                    while True:
+                        chunk = f.read(chunk_size)
+                        if not chunk:
+                            return
+                        yield chunk
+            elif file_size:
+                with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+                    for offset in range(0, file_size, chunk_size):
+                        yield mapping[offset:offset + chunk_size]
+
+        tail = b""
+        for chunk in chunks():
+            data = tail + chunk
+            # Keep the trailing run of candidate characters for the next chunk so no
+            # candidate is split, whatever separates them (newlines, commas, spaces)
+            cut = len(data.rstrip(b"0123456789.:"))
+            if not cut and len(data) > chunk_size:
+                # No separator at all in over a chunk: not a candidate list, don't buffer it
+                cut = len(data)
+            data, tail = data[:cut], data[cut:]
+            for match in pattern.finditer(data):
+                candidate = match.group().decode("ascii")
+                key = self._proxy_key(candidate)
+                if key is not None and seen.add(key):
+                    yield candidate
+        for match in pattern.finditer(tail):
+            candidate = match.group().decode("ascii")
+            key = self._proxy_key(candidate)
+            if key is not None and seen.add(key):
+                yield candidate
+
+    def load_from_files(self, stream: bool = False):
+        """Load proxies or captcha keys from a file; with stream, proxies come back as a lazy iterator."""
         console.print("\n[bold blue]📁 Loading from files...[/bold blue]")
 
-        # List .txt files in current directory
-        txt_files = [f for f in os.listdir(".") if f.endswith(".txt")]
+        # List .txt and .gz files in current directory
+        txt_files = [f for f in os.listdir(".") if f.endswith((".txt", ".gz"))]
 
-        if not txt_files:
+        if txt_files:
+            console.print(f"\n[bold]Available files:[/bold]")
+            for i, file in enumerate(txt_files, 1):
+                console.print(f"{i}. {file}")
+        else:
             console.print("[yellow]No .txt files found in current directory[/yellow]")
-            return
-
-        console.print(f"\n[bold]Available .txt files:[/bold]")
-        for i, file in enumerate(txt_files, 1):
-            console.print(f"{i}. {file}")
+        console.print("0. Enter a path")
 
         try:
-            choices = [str(i) for i in range(1, len(txt_files) + 1)]
+            choices = [str(i) for i in range(0, len(txt_files) + 1)]
             choice = Prompt.ask("\nSelect file number", choices=choices)
-            selected_file = txt_files[int(choice) - 1]
+            if choice == "0":
+                selected_file = str(Path(Prompt.ask("Path to file")).expanduser())
+            else:
+                selected_file = txt_files[int(choice) - 1]
+
+            if not Path(selected_file).is_file():
+                console.print(f"[red]File not found: {selected_file}[/red]")
+                return []
 
             file_type = Prompt.ask("File type", choices=["proxies", "captcha_keys"])
 
             if file_type == "proxies":
-                proxies = []
-                with open(selected_file, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and ':' in line:
-                            proxies.append(line)
+                proxies = self.iter_candidates_from_file(selected_file)
+                if stream:
+                    console.print(f"[green]Streaming proxies from {selected_file}[/green]")
+                    return proxies
+                proxies = list(proxies)
                 console.print(f"[green]Loaded {len(proxies)} proxies from {selected_file}[/green]")
                 return proxies
             else:
@@ -804,6 +3101,12 @@ class ProxyCaptchaScraper:
             f"Last tested: {len(self.working_proxies)} proxies"
         )
 
+        standby_count = sum(len(members) for members in self.standby_proxies.values())
+        results_table.add_row(
+            "Effective Pool", str(self.effective_pool_size()),
+            f"Distinct exit IPs ({standby_count} standby proxies)"
+        )
+
         results_table.add_row(
             "Working Captcha Keys", str(len(self.working_captcha_keys)),
             f"Last tested: {len(self.working_captcha_keys)} keys"
@@ -851,11 +3154,21 @@ class ProxyCaptchaScraper:
                             console.print("[green]✅ New sources added to existing list![/green]")
                     
                     # Now scrape with all available sources
-                    proxies = await self.scrape_proxies()
+                    delta_only = Confirm.ask("Only keep proxies new since each source's last fetch?", default=False)
+                    proxies = await self.scrape_proxies(delta_only=delta_only)
                     if proxies:
                         test_now = Confirm.ask("\nTest proxies now?")
                         if test_now:
-                            self.working_proxies = await self.test_proxies(proxies)
+                            target = Prompt.ask("Stop after how many working proxies (0 = test all)", default="0")
+                            # Only what was tested (or deliberately skipped) leaves the next delta
+                            consumed = []
+                            planner = SubnetProbePlanner(**self.probe_planner_settings, on_skip=consumed.extend)
+                            self.working_proxies = await self.test_proxies(
+                                proxies, target_count=int(target), planner=planner,
+                                on_result=lambda is_working, result: consumed.append(result["proxy"])
+                            )
+                            self.standby_proxies = {}
+                            self.commit_source_snapshots(consumed)
                         else:
                             console.print(f"[yellow]Proxies saved for later testing[/yellow]")
 
@@ -909,11 +3222,55 @@ class ProxyCaptchaScraper:
                     if not self.working_proxies:
                         console.print("[yellow]No proxies to test. Scrape some first![/yellow]")
                     else:
-                        max_workers = Prompt.ask("Max concurrent tests", default="50")
-                        self.working_proxies = await self.test_proxies(
-                            [p['proxy'] if isinstance(p, dict) else p for p in self.working_proxies],
-                            int(max_workers)
-                        )
+                        console.print("\n[bold blue]⚡ Proxy Testing Options:[/bold blue]")
+                        console.print("1. Test all proxies once")
+                        console.print("2. Re-validate continuously (adaptive schedule)")
+                        console.print("3. Collapse redundant proxies by exit IP")
+                        console.print("4. Benchmark bandwidth")
+                        test_choice = Prompt.ask("Select option", choices=["1", "2", "3", "4"])
+
+                        if test_choice == "1":
+                            max_workers = Prompt.ask("Max concurrent tests", default="50")
+                            target = Prompt.ask("Stop after how many working proxies (0 = test all)", default="0")
+                            # Standbys are re-tested with the pool; collapse again afterwards
+                            candidates = [p['proxy'] if isinstance(p, dict) else p for p in self.working_proxies]
+                            for members in self.standby_proxies.values():
+                                candidates.extend(member['proxy'] for member in members)
+                            # Known-good entries: one failed sample must not drop the rest of a subnet
+                            planner = SubnetProbePlanner(**dict(self.probe_planner_settings, skip_dead_subnets=False))
+                            self.working_proxies = await self.test_proxies(
+                                candidates,
+                                int(max_workers),
+                                target_count=int(target),
+                                planner=planner
+                            )
+                            self.standby_proxies = {}
+                        elif test_choice == "3":
+                            granularity = Prompt.ask("Cluster by", choices=["ip", "subnet", "asn"], default="ip")
+                            await self.collapse_redundant_proxies(granularity)
+                        elif test_choice == "4":
+                            judge_url = Prompt.ask("Judge URL (empty = bundled judge on this host)", default="")
+                            payload_mb = Prompt.ask("Payload size in MB", default="1")
+                            max_workers = Prompt.ask("Max concurrent downloads", default="10")
+                            await self.benchmark_bandwidth(
+                                judge_url=judge_url or None,
+                                payload_bytes=int(float(payload_mb) * 1_000_000),
+                                max_workers=int(max_workers)
+                            )
+                        else:
+                            max_workers = Prompt.ask("Max concurrent tests", default="20")
+                            minutes = Prompt.ask("Run for how many minutes (0 = until Ctrl+C)", default="0")
+                            snapshot_path = None
+                            if Confirm.ask("Publish a binary pool snapshot for consumer processes?"):
+                                snapshot_path = self.get_downloads_folder() / "grass_pool.bin"
+                            try:
+                                await self.revalidate_continuously(
+                                    int(max_workers),
+                                    duration=float(minutes) * 60 or None,
+                                    snapshot_path=snapshot_path
+                                )
+                            except KeyboardInterrupt:
+                                console.print("[yellow]Re-validation stopped[/yellow]")
 
                 elif choice == "4":  # Test Captcha Keys
                     if not self.working_captcha_keys:
@@ -933,13 +3290,26 @@ class ProxyCaptchaScraper:
                     self.save_results(filename)
 
                 elif choice == "7":  # Load from Files
-                    self.load_from_files()
+                    loaded = self.load_from_files(stream=True)
+                    if loaded is not None and not isinstance(loaded, list):
+                        if Confirm.ask("\nTest proxies now (streamed from the file)?"):
+                            max_workers = Prompt.ask("Max concurrent tests", default="50")
+                            target = Prompt.ask("Stop after how many working proxies (0 = test all)", default="0")
+                            self.working_proxies = await self.test_proxies(
+                                loaded, int(max_workers), target_count=int(target)
+                            )
+                            self.standby_proxies = {}
 
                 elif choice == "8":  # Save to Downloads
                     save_type = Prompt.ask("Save type", choices=["proxies", "captcha_keys"])
                     if save_type == "proxies":
-                        proxies_to_save = self.working_proxies + self.failed_proxies
-                        self.save_proxies_to_downloads(proxies_to_save)
+                        format_type = Prompt.ask("Format", choices=["txt", "json", "bin"], default="txt")
+                        if format_type == "bin":
+                            # Consumers mmap a stable path, so the snapshot holds the pool and its standbys
+                            self.save_pool_snapshot()
+                        else:
+                            proxies_to_save = self.working_proxies + self.failed_proxies
+                            self.save_proxies_to_downloads(proxies_to_save, format_type)
                     else:
                         keys_to_save = self.working_captcha_keys + self.failed_captcha_keys
                         self.save_captcha_keys_to_downloads(keys_to_save)
@@ -969,15 +3339,62 @@ class ProxyCaptchaScraper:
                 console.print(f"\n[bold red]Error: {e}[/bold red]")
                 input("Press Enter to continue...")
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="GRASS Proxy & Captcha Key Scraper & Tester")
+    parser.add_argument("--coordinator", metavar="HOST:PORT",
+                        help="scrape proxies and hand them out to test workers instead of the interactive menu")
+    parser.add_argument("--worker", metavar="URL",
+                        help="test batches leased from the coordinator at URL, e.g. http://10.0.0.5:8765")
+    parser.add_argument("--batch-size", type=int, default=200, help="candidates per leased batch")
+    parser.add_argument("--lease-ttl", type=float, default=120,
+                        help="seconds without results before a batch is re-issued")
+    parser.add_argument("--max-workers", type=int, default=50, help="concurrent proxy tests per worker")
+    parser.add_argument("--token", default=os.environ.get("GRASS_COORDINATOR_TOKEN"),
+                        help="shared secret between coordinator and workers (default: $GRASS_COORDINATOR_TOKEN; "
+                             "the coordinator generates and prints one if unset)")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on http://HOST:PORT/metrics")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="interface for the metrics endpoint")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="record stage timings and event-loop lag to a trace-event JSON file")
+    parser.add_argument("--profile-cprofile", action="store_true", help="also capture a cProfile per stage")
+    parser.add_argument("--profile-tracemalloc", action="store_true",
+                        help="also capture tracemalloc allocation diffs per stage")
+    parser.add_argument("--bench-http", action="store_true",
+                        help="benchmark shared HTTP sessions against a fresh session per stage, then exit")
+    return parser.parse_args(argv)
+
 def main():
+    args = parse_args()
+    scraper = None
     try:
         scraper = ProxyCaptchaScraper()
-        asyncio.run(scraper.run())
+        if args.profile:
+            scraper.profiler = StageProfiler(args.profile, args.profile_cprofile, args.profile_tracemalloc)
+        if args.metrics_port:
+            scraper.metrics.serve(args.metrics_host, args.metrics_port)
+            console.print(f"[blue]Metrics on http://{args.metrics_host}:{args.metrics_port}/metrics[/blue]")
+        if args.bench_http:
+            asyncio.run(scraper.run_until_closed(scraper.benchmark_session_reuse()))
+        elif args.coordinator:
+            host, _, port = args.coordinator.rpartition(":")
+            working = asyncio.run(scraper.run_until_closed(
+                scraper.run_coordinator(host or "0.0.0.0", int(port), args.batch_size, args.lease_ttl,
+                                        token=args.token)))
+            if working:
+                scraper.save_proxies_to_downloads(working)
+        elif args.worker:
+            asyncio.run(scraper.run_until_closed(
+                scraper.run_worker(args.worker, args.batch_size, args.max_workers, token=args.token or "")))
+        else:
+            asyncio.run(scraper.run_until_closed(scraper.run()))
     except KeyboardInterrupt:
         console.print("\n[bold red]Goodbye![/bold red]")
     except Exception as e:
         console.print(f"\n[bold red]Fatal error: {e}[/bold red]")
         console.print_exception()
+    finally:
+        if scraper is not None and scraper.profiler is not None:
+            scraper.profiler.write()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file